@@ -1,94 +1,435 @@
 # app.py - Flask RESTful API for Parking Lot System
-from flask import Flask, request, jsonify  # Core Flask imports
+from flask import Flask, Response, request, jsonify  # Core Flask imports
+from flask.json.provider import DefaultJSONProvider
+import atexit
+import functools
+import itertools
+import time
 import uuid  # For generating ticket IDs (already in your code)
-from datetime import datetime  # For entry times
+from datetime import datetime, timedelta  # For entry times and analytics ranges
 
 # Import your project modules
 from parking_lot_system import ParkingLot, Car, Bus, Motorcycle  # Core classes
+from parking_lot_system.metrics import MetricsInstrumentation, render_prometheus, CONTENT_TYPE
+from parking_lot_system.facilities import FacilityRegistry
+from parking_lot_system import analytics
+from parking_lot_system import serialization
+from parking_lot_system.enums import SpotType
+from parking_lot_system.config import (
+    AVAILABILITY_LONG_POLL_SECONDS, AVAILABILITY_STREAM_SECONDS, SESSIONS_PAGE_LIMIT, ANALYTICS_MAX_RANGE_DAYS
+)
 from parking_lot_system.exceptions import (
     ParkingFullException, InvalidTicketException, SpotNotFoundException,
-    VehicleAlreadyParkedException  # Your custom exceptions
+    VehicleAlreadyParkedException, FacilityNotFoundException, ReservationException  # Your custom exceptions
 )
 
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() / request.get_json() through serialization (orjson when installed, config.JSON_ENCODER)."""
+
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serialization.dumps(obj), mimetype=self.mimetype)  # bytes, no str round trip
+
 # Step 1: Create Flask app instance
 app = Flask(__name__)  # __name__ is a Python magic variable; use 'app' to refer to this server
+app.json = FastJSONProvider(app)
 
 # Step 2: Initialize ParkingLot (loads from DB automatically via your db.py)
-lot = ParkingLot(num_levels=2, spots_per_level=10)  # Same config as main.py; persists via DB
+lot = ParkingLot(num_levels=2, spots_per_level=10,  # Same config as main.py; persists via DB
+                 instrumentation=MetricsInstrumentation())  # latency histograms + counters for /metrics
+
+# Other garages (config.FACILITIES): loaded on first request, closed when idle, one DB file each.
+# The default lot is facility 'main' too, so /facilities/main/... is the same garage as /...
+registry = FacilityRegistry(instrumentation_factory=MetricsInstrumentation)
+registry.adopt('main', lot)
+atexit.register(registry.close)  # flush every loaded facility on shutdown
+
+def lot_route(rule, **options):
+    """
+    Register a view for the default lot (rule) and for every facility
+    (/facilities/<facility_id>rule); the view receives the lot as its first argument.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(facility_id=None, **kwargs):
+            if facility_id is None:
+                return view(lot, **kwargs)
+            try:
+                with registry.lease(facility_id) as facility_lot:  # not evicted while the request runs
+                    return view(facility_lot, **kwargs)
+            except FacilityNotFoundException as e:
+                return error_response(str(e), 404)
+        app.add_url_rule(rule, view.__name__, wrapper, **options)
+        app.add_url_rule(f'/facilities/<facility_id>{rule}', f'facility_{view.__name__}', wrapper, **options)
+        return wrapper
+    return decorator
+
+def error_response(message: str, status: int):
+    """{'error': message} with status, encoded by serialization.dumps (orjson when available)."""
+    return Response(serialization.dumps({'error': message}), status=status, content_type='application/json')
+
+def _json_object():
+    """The request body as a JSON object; None if it is missing, invalid or not an object (-> 400, not 500)."""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def _vehicle_from_json(item: dict):
+    """Build a vehicle from {'vehicle_type', 'license_plate'}; returns (vehicle, None) or (None, error message)."""
+    vehicle_type = str(item.get('vehicle_type', '')).upper()
+    license_plate = item.get('license_plate')
+    if not vehicle_type or not license_plate:
+        return None, 'Missing vehicle_type or license_plate'
+    if not isinstance(license_plate, str):
+        return None, 'license_plate must be a string'
+    if vehicle_type == 'CAR':
+        return Car(license_plate), None
+    if vehicle_type == 'BUS':
+        return Bus(license_plate), None
+    if vehicle_type == 'MOTORCYCLE':
+        return Motorcycle(license_plate), None
+    return None, f'Invalid vehicle_type: {vehicle_type}. Must be CAR, BUS, or MOTORCYCLE'
 
 # Step 3: Define Routes (Endpoints)
-@app.route('/park', methods=['POST'])  # POST for creating a new parking entry
-def park_vehicle_api():
+@lot_route('/park', methods=['POST'])  # POST for creating a new parking entry
+def park_vehicle_api(lot):
     """
     Park a vehicle.
     Request: JSON with {'vehicle_type': 'CAR', 'license_plate': 'ABC123'}
     Response: {'ticket_id': 'uuid-string'} or error
     """
     # Get JSON data from request body
-    data = request.get_json()  # Parses incoming JSON automatically
+    data = _json_object()  # Parses incoming JSON automatically
     if not data:
-        return jsonify({'error': 'No JSON data provided'}), 400  # 400 Bad Request
+        return error_response('No JSON data provided', 400)  # 400 Bad Request
 
-    # Validate required fields
-    vehicle_type = data.get('vehicle_type', '').upper()  # e.g., 'car' → 'CAR'
-    license_plate = data.get('license_plate')
-    if not vehicle_type or not license_plate:
-        return jsonify({'error': 'Missing vehicle_type or license_plate'}), 400
+    # Validate required fields and create vehicle object based on type (mirrors your models)
+    vehicle, error = _vehicle_from_json(data)
+    if error:
+        return error_response(error, 400)
 
-    # Create vehicle object based on type (mirrors your models)
     try:
-        if vehicle_type == 'CAR':
-            vehicle = Car(license_plate)
-        elif vehicle_type == 'BUS':
-            vehicle = Bus(license_plate)
-        elif vehicle_type == 'MOTORCYCLE':
-            vehicle = Motorcycle(license_plate)
-        else:
-            return jsonify({'error': f'Invalid vehicle_type: {vehicle_type}. Must be CAR, BUS, or MOTORCYCLE'}), 400
-
         # Call your core logic
         ticket_id = lot.park_vehicle(vehicle)
-        return jsonify({'ticket_id': ticket_id, 'message': f'Vehicle {license_plate} parked successfully'}), 201  # 201 Created
+        return jsonify({'ticket_id': ticket_id, 'message': f'Vehicle {vehicle.license_plate} parked successfully'}), 201  # 201 Created
 
     except VehicleAlreadyParkedException as e:
-        return jsonify({'error': str(e)}), 409  # 409 Conflict
+        return error_response(str(e), 409)  # 409 Conflict
     except ParkingFullException as e:
-        return jsonify({'error': str(e)}), 400
+        return error_response(str(e), 400)
     except Exception as e:  # Catch-all for unexpected errors
-        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+        return error_response(f'Internal server error: {str(e)}', 500)
+
+# Per-item HTTP-style status for batch results (same codes as the single-item routes)
+BATCH_ERROR_STATUS = {
+    VehicleAlreadyParkedException: 409,
+    ParkingFullException: 400,
+    InvalidTicketException: 404,
+    SpotNotFoundException: 400,
+}
 
-@app.route('/unpark', methods=['POST'])
-def unpark_vehicle_api():
+@lot_route('/park/batch', methods=['POST'])
+def park_batch_api(lot):
+    """
+    Park many vehicles in one allocation pass and one DB transaction (e.g. replaying buffered gate events).
+    Request: JSON with {'vehicles': [{'vehicle_type': 'CAR', 'license_plate': 'ABC123'}, ...]}
+    Response: {'results': [{'status': 201, 'ticket_id': ...} | {'status': 4xx, 'error': ...}, ...]} in request order
+    """
+    data = _json_object()
+    if not data or not isinstance(data.get('vehicles'), list):
+        return error_response('Missing vehicles list', 400)
+
+    # Validate every item first; only valid vehicles go to the lot
+    results = [None] * len(data['vehicles'])
+    vehicles, positions = [], []
+    for i, item in enumerate(data['vehicles']):
+        vehicle, error = _vehicle_from_json(item if isinstance(item, dict) else {})
+        if error:
+            results[i] = {'status': 400, 'error': error}
+        else:
+            vehicles.append(vehicle)
+            positions.append(i)
+
+    try:
+        outcomes = lot.park_many(vehicles)
+    except Exception as e:  # Catch-all for unexpected errors (e.g. storage failure)
+        return error_response(f'Internal server error: {str(e)}', 500)
+
+    for i, outcome in zip(positions, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = {'status': BATCH_ERROR_STATUS.get(type(outcome), 400), 'error': str(outcome)}
+        else:
+            results[i] = {'status': 201, 'ticket_id': outcome}
+    return jsonify({'results': results}), 200
+
+@lot_route('/unpark', methods=['POST'])
+def unpark_vehicle_api(lot):
     """
     Unpark a vehicle.
     Request: JSON with {'ticket_id': 'uuid-string'}
     Response: {'message': 'Unparked. Fee: $X.XX'} or error
     """
-    data = request.get_json()
+    data = _json_object()
     if not data or 'ticket_id' not in data:
-        return jsonify({'error': 'Missing ticket_id'}), 400
+        return error_response('Missing ticket_id', 400)
+    if not isinstance(data['ticket_id'], str):
+        return error_response('ticket_id must be a string', 400)
 
     ticket_id = data['ticket_id']
     try:
         result = lot.unpark_vehicle(ticket_id)
         return jsonify({'message': result}), 200  # 200 OK
     except InvalidTicketException as e:
-        return jsonify({'error': str(e)}), 404  # 404 Not Found
+        return error_response(str(e), 404)  # 404 Not Found
     except SpotNotFoundException as e:
-        return jsonify({'error': str(e)}), 400
+        return error_response(str(e), 400)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+        return error_response(f'Internal server error: {str(e)}', 500)
 
-@app.route('/availability', methods=['GET'])
-def get_availability():
+@lot_route('/unpark/batch', methods=['POST'])
+def unpark_batch_api(lot):
+    """
+    Unpark many tickets in one DB transaction.
+    Request: JSON with {'ticket_ids': ['uuid-string', ...]}
+    Response: {'results': [{'status': 200, 'message': ...} | {'status': 4xx, 'error': ...}, ...]} in request order
+    """
+    data = _json_object()
+    if not data or not isinstance(data.get('ticket_ids'), list):
+        return error_response('Missing ticket_ids list', 400)
+
+    results = [None] * len(data['ticket_ids'])
+    ticket_ids, positions = [], []
+    for i, ticket_id in enumerate(data['ticket_ids']):
+        if isinstance(ticket_id, str):
+            ticket_ids.append(ticket_id)
+            positions.append(i)
+        else:
+            results[i] = {'status': 400, 'error': 'ticket_id must be a string'}
+
+    try:
+        outcomes = lot.unpark_many(ticket_ids)
+    except Exception as e:
+        return error_response(f'Internal server error: {str(e)}', 500)
+
+    for i, outcome in zip(positions, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = {'status': BATCH_ERROR_STATUS.get(type(outcome), 400), 'error': str(outcome)}
+        else:
+            results[i] = {'status': 200, 'message': outcome}
+    return jsonify({'results': results}), 200
+
+@lot_route('/availability', methods=['GET'])
+def get_availability(lot):
     """
     Get current spot availability.
-    Response: JSON with levels and available spots by type
+    Response: JSON with levels and available spots by type, served from the lot's latest
+    immutable snapshot (never locks a level), with an ETag and X-Availability-Version header;
+    gzip-compressed for clients sending Accept-Encoding: gzip.
+    Conditional GET: send the ETag back in If-None-Match to get 304 while nothing changed.
+    Long poll: ?since=<version>&timeout=<seconds> waits until the version moves (or the timeout).
     No request body needed.
     """
-    # Use your existing status method (add if not present; see below)
-    status = lot.get_parking_status()  # Assuming you added this helper
-    return jsonify(status), 200
+    since = request.args.get('since', type=int)
+    if since is None:
+        snapshot = lot.availability.current()
+    else:
+        timeout = min(request.args.get('timeout', AVAILABILITY_LONG_POLL_SECONDS, type=float),
+                      AVAILABILITY_LONG_POLL_SECONDS)
+        snapshot = lot.availability.wait_for_change(since, timeout)
+    # Pre-serialized (and pre-compressed) once per version by the feed: nothing is encoded here
+    if snapshot.gzip_body is not None and serialization.accepts_gzip(request.headers.get('Accept-Encoding')):
+        response = Response(snapshot.gzip_body, content_type='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(snapshot.etag + '-gz')  # each representation has its own strong ETag
+    else:
+        response = Response(snapshot.body, content_type='application/json')
+        response.set_etag(snapshot.etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Availability-Version'] = str(snapshot.version)
+    return response.make_conditional(request)  # 304 if If-None-Match matches
+
+@lot_route('/availability/stream', methods=['GET'])
+def availability_stream(lot):
+    """
+    Server-sent events for signage: an 'availability' event (id = version, data = the
+    /availability JSON) right away and then on every change. The stream ends after
+    AVAILABILITY_STREAM_SECONDS; EventSource reconnects with Last-Event-ID and resumes.
+    """
+    feed = lot.availability
+    last_version = request.headers.get('Last-Event-ID', -1, type=int)
+
+    def events():
+        version = last_version
+        deadline = time.monotonic() + AVAILABILITY_STREAM_SECONDS
+        yield 'retry: 1000\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            snapshot = feed.wait_for_change(version, min(remaining, AVAILABILITY_LONG_POLL_SECONDS))
+            if snapshot.version == version:
+                yield ': keep-alive\n\n'  # comment line so proxies don't drop an idle stream
+                continue
+            version = snapshot.version
+            yield f"event: availability\nid: {version}\ndata: {snapshot.body.decode('utf-8')}\n\n"
+
+    return Response(events(), content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@lot_route('/vehicle/<license_plate>', methods=['GET'])
+def find_vehicle_api(lot, license_plate):
+    """
+    Where is my car? Answered from the in-memory plate index (no DB query).
+    Response: {'license_plate', 'level_id', 'spot_number', 'ticket_id'} or 404 if not parked
+    """
+    location = lot.find_vehicle(license_plate)
+    if location is None:
+        return error_response(f'Vehicle {license_plate} is not parked', 404)
+    return jsonify(location), 200
+
+def _parse_datetime(value) -> datetime:
+    """ISO datetime as the lot keeps times: naive local. An explicit offset (or Z) is converted to local time."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00') if value.endswith('Z') else value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def _time_range(lot):
+    """?start=&end= as ISO datetimes (default: the last 24 hours of the lot's clock); returns (start, end, None) or (None, None, error)."""
+    try:
+        end = _parse_datetime(request.args['end']) if 'end' in request.args else lot.clock.now()
+        start = _parse_datetime(request.args['start']) if 'start' in request.args else end - timedelta(days=1)
+    except (ValueError, OverflowError):  # OverflowError: e.g. end=0001-01-01 minus the default day
+        return None, None, 'start and end must be ISO datetimes, e.g. 2024-05-01T00:00:00'
+    if start >= end:
+        return None, None, 'start must be before end'
+    if end - start > timedelta(days=ANALYTICS_MAX_RANGE_DAYS):
+        return None, None, f'start to end may span at most {ANALYTICS_MAX_RANGE_DAYS} days'
+    return start, end, None
+
+@lot_route('/sessions', methods=['GET'])
+def sessions_api(lot):
+    """
+    Completed stays from the session archive, oldest exit first.
+    Query: ?start=&end= (ISO, default last 24h), ?license_plate=, ?limit= (default/max SESSIONS_PAGE_LIMIT)
+    Response: {'sessions': [{'ticket_id', 'license_plate', 'vehicle_type', 'level_id', 'spot_number',
+                             'entry_time', 'exit_time', 'fee'}, ...]}
+    """
+    start, end, error = _time_range(lot)
+    if error:
+        return error_response(error, 400)
+    limit = min(request.args.get('limit', SESSIONS_PAGE_LIMIT, type=int), SESSIONS_PAGE_LIMIT)
+    sessions = lot.completed_sessions(start, end, request.args.get('license_plate'))
+    return jsonify({'sessions': [s._asdict() for s in itertools.islice(sessions, limit)]}), 200
+
+@lot_route('/analytics/occupancy', methods=['GET'])
+def occupancy_analytics_api(lot):
+    """
+    Hourly occupancy curve: average parked vehicles, arrivals and departures per clock hour.
+    Query: ?start=&end= (ISO, default last 24h). Streams the archive, no rows are held in memory.
+    """
+    start, end, error = _time_range(lot)
+    if error:
+        return error_response(error, 400)
+    return jsonify({'hours': analytics.hourly_occupancy(lot.completed_sessions(start, end), start, end)}), 200
+
+@lot_route('/analytics/dwell', methods=['GET'])
+def dwell_analytics_api(lot):
+    """
+    Dwell-time percentiles (minutes), overall and per vehicle type, for stays overlapping ?start=&end=.
+    """
+    start, end, error = _time_range(lot)
+    if error:
+        return error_response(error, 400)
+    return jsonify(analytics.dwell_percentiles(lot.completed_sessions(start, end))), 200
+
+@lot_route('/analytics/peak-hours', methods=['GET'])
+def peak_hours_api(lot):
+    """
+    Peak-hour report: the ?top= (default 3) busiest hours and the average occupancy per hour of day.
+    Query: ?start=&end= (ISO, default last 24h)
+    """
+    start, end, error = _time_range(lot)
+    if error:
+        return error_response(error, 400)
+    top = request.args.get('top', 3, type=int)
+    return jsonify(analytics.peak_hours(lot.completed_sessions(start, end), start, end, top)), 200
+
+def _reservation_window(lot, data):
+    """
+    spot_type, start and end from a dict of strings (times as _parse_datetime, so comparable with
+    lot.clock); returns (spot_type, start, end, None) or (None, None, None, error).
+    """
+    try:
+        spot_type = SpotType[str(data.get('spot_type', '')).upper()]
+    except KeyError:
+        return None, None, None, 'spot_type must be MOTORCYCLE, COMPACT or LARGE'
+    try:
+        start, end = _parse_datetime(data['start']), _parse_datetime(data['end'])
+    except (KeyError, TypeError, AttributeError, ValueError, OverflowError):
+        return None, None, None, 'start and end must be ISO datetimes, e.g. 2024-05-01T14:00:00'
+    if start >= end:
+        return None, None, None, 'start must be before end'
+    if end <= lot.clock.now():
+        return None, None, None, 'Reservation window must end in the future'
+    return spot_type, start, end, None
+
+@lot_route('/reservations', methods=['POST'])
+def create_reservation_api(lot):
+    """
+    Reserve a spot for a time window.
+    Request: JSON with {'license_plate': 'ABC123', 'spot_type': 'COMPACT',
+                        'start': '2024-05-01T14:00:00', 'end': '2024-05-01T18:00:00', 'level_id': 1 (optional)}
+    Response: the reservation (reservation_id, level_id, ...) or error
+    """
+    data = _json_object()
+    if not data or not data.get('license_plate'):
+        return error_response('Missing license_plate', 400)
+    if not isinstance(data['license_plate'], str):
+        return error_response('license_plate must be a string', 400)
+    spot_type, start, end, error = _reservation_window(lot, data)
+    if error:
+        return error_response(error, 400)
+
+    try:
+        reservation = lot.reserve(data['license_plate'], spot_type, start, end, data.get('level_id'))
+    except ReservationException as e:
+        return error_response(str(e), 400)
+    except ParkingFullException as e:
+        return error_response(str(e), 409)  # 409 Conflict: that window is fully booked
+    except Exception as e:
+        return error_response(f'Internal server error: {str(e)}', 500)
+    return jsonify({**reservation._asdict(), 'spot_type': spot_type.name,
+                    'start': start.isoformat(), 'end': end.isoformat()}), 201
+
+@lot_route('/reservations/<reservation_id>', methods=['DELETE'])
+def cancel_reservation_api(lot, reservation_id):
+    """Cancel a reservation; its spot becomes bookable (and usable by walk-ins) again."""
+    try:
+        lot.cancel_reservation(reservation_id)
+    except ReservationException as e:
+        return error_response(str(e), 404)
+    return jsonify({'message': f'Reservation {reservation_id} cancelled'}), 200
+
+@lot_route('/reservations/availability', methods=['GET'])
+def reservation_availability_api(lot):
+    """?spot_type=&start=&end=: {'levels': {level_id: spots still bookable for the whole window}}."""
+    spot_type, start, end, error = _reservation_window(lot, request.args)
+    if error:
+        return error_response(error, 400)
+    return jsonify({'levels': lot.reservable(spot_type, start, end)}), 200
+
+@lot_route('/metrics', methods=['GET'])
+def metrics(lot):
+    """
+    Prometheus scrape endpoint: park/unpark/storage latency histograms,
+    rejection counters and per-level/SpotType occupancy gauges (text exposition format).
+    """
+    return Response(render_prometheus(lot), content_type=CONTENT_TYPE)
 
 # Step 4: Run the server
 if __name__ == '__main__':
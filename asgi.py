@@ -0,0 +1,280 @@
+# asgi.py - ASGI entry point for the Parking Lot System (same routes as app.py)
+# Run with any ASGI server, e.g.:  uvicorn asgi:app --host 0.0.0.0 --port 8000
+# One event loop holds every keep-alive connection; blocking storage I/O runs in a small thread pool.
+from urllib.parse import parse_qs
+
+from parking_lot_system import ParkingLot, VehicleType
+from parking_lot_system import serialization
+from parking_lot_system.snapshot import AvailabilitySnapshot
+from parking_lot_system.async_lot import AsyncParkingLot
+from parking_lot_system.metrics import MetricsInstrumentation, render_prometheus, CONTENT_TYPE
+from parking_lot_system.models import make_vehicle
+from parking_lot_system.config import AVAILABILITY_LONG_POLL_SECONDS
+from parking_lot_system.exceptions import (
+    ParkingFullException, InvalidTicketException, SpotNotFoundException,
+    VehicleAlreadyParkedException
+)
+
+# Initialize ParkingLot (loads from DB automatically) and wrap it for asyncio
+lot = AsyncParkingLot(ParkingLot(num_levels=2, spots_per_level=10,  # Same config as app.py
+                                 instrumentation=MetricsInstrumentation()))
+
+
+async def _send_body(send, status: int, body: bytes, content_type: bytes, extra_headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type),
+                    (b'content-length', str(len(body)).encode()), *extra_headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status: int, payload: dict):
+    await _send_body(send, status, serialization.dumps(payload), b'application/json')
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get('headers', ()):
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+
+def _query_arg(scope, name: str, type, default=None):
+    """Like Flask's request.args.get(name, default, type=...): default if missing or not convertible."""
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(name)
+    try:
+        return type(values[0]) if values else default
+    except ValueError:
+        return default
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match (a list of quoted, possibly weak, tags or '*') against an unquoted etag."""
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/').strip('"') == etag for tag in tags)
+
+
+async def _send_snapshot(send, scope, snapshot: AvailabilitySnapshot):
+    """
+    The snapshot's pre-encoded body, or its pre-compressed one if the client accepts gzip,
+    with the same ETag / X-Availability-Version headers as app.py; 304 if If-None-Match matches.
+    """
+    gzipped = snapshot.gzip_body is not None and serialization.accepts_gzip(_header(scope, b'accept-encoding'))
+    etag = snapshot.etag + '-gz' if gzipped else snapshot.etag  # each representation has its own strong ETag
+    headers = [(b'etag', f'"{etag}"'.encode()), (b'vary', b'accept-encoding'),
+               (b'x-availability-version', str(snapshot.version).encode())]
+    if _etag_matches(_header(scope, b'if-none-match'), etag):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+    elif gzipped:
+        await _send_body(send, 200, snapshot.gzip_body, b'application/json',
+                         [(b'content-encoding', b'gzip'), *headers])
+    else:
+        await _send_body(send, 200, snapshot.body, b'application/json', headers)
+
+
+async def _read_json(receive):
+    """Read the full request body and parse it as a JSON object (None if empty, invalid or not an object)."""
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    try:
+        data = serialization.loads(b''.join(chunks) or b'null')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def park_vehicle_api(scope, receive):
+    data = await _read_json(receive)
+    if not data:
+        return 400, {'error': 'No JSON data provided'}
+
+    vehicle_type = str(data.get('vehicle_type', '')).upper()
+    license_plate = data.get('license_plate')
+    if not vehicle_type or not license_plate:
+        return 400, {'error': 'Missing vehicle_type or license_plate'}
+    if not isinstance(license_plate, str):
+        return 400, {'error': 'license_plate must be a string'}
+    if vehicle_type not in VehicleType.__members__:
+        return 400, {'error': f'Invalid vehicle_type: {vehicle_type}. Must be CAR, BUS, or MOTORCYCLE'}
+
+    try:
+        ticket_id = await lot.park_vehicle(make_vehicle(VehicleType[vehicle_type], license_plate))
+        return 201, {'ticket_id': ticket_id, 'message': f'Vehicle {license_plate} parked successfully'}
+    except VehicleAlreadyParkedException as e:
+        return 409, {'error': str(e)}
+    except ParkingFullException as e:
+        return 400, {'error': str(e)}
+
+
+async def unpark_vehicle_api(scope, receive):
+    data = await _read_json(receive)
+    if not data or 'ticket_id' not in data:
+        return 400, {'error': 'Missing ticket_id'}
+    if not isinstance(data['ticket_id'], str):
+        return 400, {'error': 'ticket_id must be a string'}
+
+    try:
+        result = await lot.unpark_vehicle(data['ticket_id'])
+        return 200, {'message': result}
+    except InvalidTicketException as e:
+        return 404, {'error': str(e)}
+    except SpotNotFoundException as e:
+        return 400, {'error': str(e)}
+
+
+# Per-item status for batch results (same codes as the single-item routes)
+BATCH_ERROR_STATUS = {
+    VehicleAlreadyParkedException: 409,
+    ParkingFullException: 400,
+    InvalidTicketException: 404,
+    SpotNotFoundException: 400,
+}
+
+
+def _batch_error(outcome: Exception) -> dict:
+    return {'status': BATCH_ERROR_STATUS.get(type(outcome), 400), 'error': str(outcome)}
+
+
+async def park_batch_api(scope, receive):
+    data = await _read_json(receive)
+    if not data or not isinstance(data.get('vehicles'), list):
+        return 400, {'error': 'Missing vehicles list'}
+
+    results = [None] * len(data['vehicles'])
+    vehicles, positions = [], []
+    for i, item in enumerate(data['vehicles']):
+        item = item if isinstance(item, dict) else {}
+        vehicle_type = str(item.get('vehicle_type', '')).upper()
+        license_plate = item.get('license_plate')
+        if not vehicle_type or not license_plate:
+            results[i] = {'status': 400, 'error': 'Missing vehicle_type or license_plate'}
+        elif not isinstance(license_plate, str):
+            results[i] = {'status': 400, 'error': 'license_plate must be a string'}
+        elif vehicle_type not in VehicleType.__members__:
+            results[i] = {'status': 400,
+                          'error': f'Invalid vehicle_type: {vehicle_type}. Must be CAR, BUS, or MOTORCYCLE'}
+        else:
+            vehicles.append(make_vehicle(VehicleType[vehicle_type], license_plate))
+            positions.append(i)
+
+    for i, outcome in zip(positions, await lot.park_many(vehicles)):
+        results[i] = _batch_error(outcome) if isinstance(outcome, Exception) else {'status': 201, 'ticket_id': outcome}
+    return 200, {'results': results}
+
+
+async def unpark_batch_api(scope, receive):
+    data = await _read_json(receive)
+    if not data or not isinstance(data.get('ticket_ids'), list):
+        return 400, {'error': 'Missing ticket_ids list'}
+
+    results = [None] * len(data['ticket_ids'])
+    ticket_ids, positions = [], []
+    for i, ticket_id in enumerate(data['ticket_ids']):
+        if isinstance(ticket_id, str):
+            ticket_ids.append(ticket_id)
+            positions.append(i)
+        else:
+            results[i] = {'status': 400, 'error': 'ticket_id must be a string'}
+
+    for i, outcome in zip(positions, await lot.unpark_many(ticket_ids)):
+        results[i] = _batch_error(outcome) if isinstance(outcome, Exception) else {'status': 200, 'message': outcome}
+    return 200, {'results': results}
+
+
+async def get_availability(scope, receive):
+    """
+    Versioned snapshot: encoded and compressed once per park/unpark, not per request.
+    Long poll: ?since=<version>&timeout=<seconds> waits (on the event loop) until the version moves.
+    """
+    since = _query_arg(scope, 'since', int)
+    if since is None:
+        return 200, lot.lot.availability.current()
+    timeout = min(_query_arg(scope, 'timeout', float, AVAILABILITY_LONG_POLL_SECONDS),
+                  AVAILABILITY_LONG_POLL_SECONDS)
+    return 200, await lot.wait_for_availability(since, timeout)
+
+
+async def find_vehicle_api(scope, receive, license_plate):
+    location = await lot.find_vehicle(license_plate)
+    if location is None:
+        return 404, {'error': f'Vehicle {license_plate} is not parked'}
+    return 200, location
+
+
+async def metrics(scope, receive):
+    return 200, render_prometheus(lot.lot)
+
+
+ROUTES = {
+    ('POST', '/park'): park_vehicle_api,
+    ('POST', '/unpark'): unpark_vehicle_api,
+    ('POST', '/park/batch'): park_batch_api,
+    ('POST', '/unpark/batch'): unpark_batch_api,
+    ('GET', '/availability'): get_availability,
+    ('GET', '/metrics'): metrics,
+}
+
+# Routes ending in a path parameter: (method, prefix) -> handler(scope, receive, param)
+PREFIX_ROUTES = {
+    ('GET', '/vehicle/'): find_vehicle_api,
+}
+
+
+def _resolve(method: str, path: str):
+    """Return (handler, extra args) for the request, or (None, None)."""
+    handler = ROUTES.get((method, path))
+    if handler is not None:
+        return handler, ()
+    for (route_method, prefix), handler in PREFIX_ROUTES.items():
+        if route_method == method and path.startswith(prefix) and len(path) > len(prefix):
+            return handler, (path[len(prefix):],)  # ASGI paths arrive already percent-decoded
+    return None, None
+
+
+def _known_path(path: str) -> bool:
+    return (any(p == path for _, p in ROUTES)
+            or any(path.startswith(prefix) and len(path) > len(prefix) for _, prefix in PREFIX_ROUTES))
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await lot.close()  # flush pending writes before the process exits
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    handler, args = _resolve(scope['method'], scope['path'])
+    if handler is None:
+        known_path = _known_path(scope['path'])
+        await _send_json(send, 405 if known_path else 404,
+                         {'error': 'Method not allowed' if known_path else 'Not found'})
+        return
+
+    try:
+        status, payload = await handler(scope, receive, *args)
+    except Exception as e:  # Catch-all for unexpected errors
+        status, payload = 500, {'error': f'Internal server error: {str(e)}'}
+    if isinstance(payload, str):  # plain-text routes (/metrics)
+        await _send_body(send, status, payload.encode('utf-8'), CONTENT_TYPE.encode())
+    elif isinstance(payload, AvailabilitySnapshot):
+        await _send_snapshot(send, scope, payload)
+    else:
+        await _send_json(send, status, payload)
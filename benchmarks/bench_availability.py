@@ -0,0 +1,58 @@
+# Availability read benchmark: CPU per /availability body, rebuilt per request vs served from the versioned snapshot
+# Usage: python benchmarks/bench_availability.py [--levels 50] [--requests 20000] [--writes-every 100]
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system import ParkingLot, SQLiteStorage, Car  # noqa: E402
+from parking_lot_system import serialization  # noqa: E402
+
+
+def _run(lot, requests: int, writes_every: int, body_for) -> float:
+    """Seconds for `requests` bodies, with one park every writes_every requests (0 = read-only)."""
+    tickets = []
+    start = time.perf_counter()
+    for i in range(requests):
+        if writes_every and i % writes_every == 0:
+            tickets.append(lot.park_vehicle(Car(f"AV-{len(tickets)}")))
+        body_for(lot)
+    elapsed = time.perf_counter() - start
+    lot.unpark_many(tickets)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/availability serialization benchmark")
+    parser.add_argument('--levels', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=100, help='spots per level')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--writes-every', type=int, default=100, help='park one vehicle every N requests (0 = never)')
+    args = parser.parse_args()
+
+    encoder = serialization.use_encoder('auto')
+    rows = {
+        'jsonify-style (status + json.dumps)': lambda lot: json.dumps(lot.get_parking_status()).encode('utf-8'),
+        '  + gzip per request': lambda lot: gzip.compress(json.dumps(lot.get_parking_status()).encode('utf-8')),
+        'snapshot body': lambda lot: lot.availability.current().body,
+        'snapshot gzip body': lambda lot: lot.availability.current().gzip_body,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        lot = ParkingLot(args.levels, args.spots, storage=SQLiteStorage(os.path.join(tmp, 'bench.db')))
+        snapshot = lot.availability.current()
+        print(f"{args.levels} levels, body {len(snapshot.body)} B, gzip {len(snapshot.gzip_body or b'')} B, "
+              f"encoder {encoder.__name__.strip('_').replace('_dumps', '')}, "
+              f"{args.requests} requests, a park every {args.writes_every or 'never'}")
+        for name, body_for in rows.items():
+            elapsed = _run(lot, args.requests, args.writes_every, body_for)
+            print(f"  {name:38} {elapsed / args.requests * 1e6:8.1f} us/request")
+        lot.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Billing benchmark: price N historical sessions with BillingEngine.fees (vectorized if NumPy is installed)
+# Usage: python benchmarks/bench_billing.py [--sessions 1000000] [--tiers]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system.billing import BillingEngine, RateTier, US_PER_DAY, np  # noqa: E402
+from parking_lot_system.enums import VehicleType  # noqa: E402
+from parking_lot_system.spot_store import VEHICLE_TYPES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BillingEngine throughput benchmark")
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--tiers', action='store_true', help='time-of-day tiers, per-type rates and a daily cap')
+    args = parser.parse_args()
+
+    if args.tiers:
+        engine = BillingEngine(rates={VehicleType.BUS: 25.0, VehicleType.MOTORCYCLE: 5.0},
+                               tiers=[RateTier(0, 6, 0.5), RateTier(17, 20, 1.5)],
+                               daily_cap=60.0, grace_minutes=10)
+    else:
+        engine = BillingEngine()
+
+    rng = random.Random(42)
+    start_us = 1_700_000_000 * 1_000_000
+    codes = [rng.randrange(len(VEHICLE_TYPES)) for _ in range(args.sessions)]
+    entries = [start_us + rng.randrange(30 * US_PER_DAY) for _ in range(args.sessions)]
+    exits = [entry + rng.randrange(2 * US_PER_DAY) for entry in entries]
+
+    began = time.perf_counter()
+    fees = engine.fees(codes, entries, exits)
+    elapsed = time.perf_counter() - began
+
+    print(f"{args.sessions} sessions ({'NumPy' if np is not None else 'pure Python'}"
+          f"{', tiered' if args.tiers else ', flat rate'})")
+    print(f"  {elapsed * 1000:8.1f} ms  ({args.sessions / elapsed:,.0f} sessions/s), revenue ${float(sum(fees)):,.2f}")
+
+
+if __name__ == '__main__':
+    main()
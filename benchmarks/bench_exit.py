@@ -0,0 +1,66 @@
+# Exit-gate latency benchmark: unpark_vehicle latency as the lot grows
+# Usage: python benchmarks/bench_exit.py [--sizes 1000 10000 100000] [--exits 2000] [--write-behind]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system import ParkingLot, SQLiteStorage, EventLogStorage, Motorcycle  # noqa: E402
+from parking_lot_system import db  # noqa: E402
+
+LEVELS = 10
+BATCH = 1000  # vehicles per park_many call while filling the lot
+
+
+def _percentile(sorted_values, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _measure(lot: ParkingLot, occupancy: float, exits: int, seed: int):
+    """Fill the lot, then time `exits` random unparks. Returns sorted latencies in microseconds."""
+    total = sum(len(level.spots) for level in lot.levels)
+    plates = [f"X{i}" for i in range(int(total * occupancy))]
+    tickets = []
+    for start in range(0, len(plates), BATCH):
+        # Motorcycles fit every spot type, so the lot fills evenly
+        tickets.extend(lot.park_many([Motorcycle(p) for p in plates[start:start + BATCH]]))
+
+    rng = random.Random(seed)
+    latencies = []
+    for ticket in rng.sample(tickets, min(exits, len(tickets))):
+        began = time.perf_counter_ns()
+        lot.unpark_vehicle(ticket)
+        latencies.append((time.perf_counter_ns() - began) / 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exit-gate (unpark) latency vs lot size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='total spots')
+    parser.add_argument('--exits', type=int, default=2000, help='unparks timed per size')
+    parser.add_argument('--occupancy', type=float, default=0.9)
+    parser.add_argument('--write-behind', action='store_true')
+    parser.add_argument('--event-log', action='store_true', help='use EventLogStorage instead of SQLite')
+    args = parser.parse_args()
+
+    print(f"{'spots':>8} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.event_log:
+                storage = EventLogStorage(os.path.join(tmp, 'eventlog'))
+            else:
+                storage = SQLiteStorage(os.path.join(tmp, 'exit.db'), write_behind=args.write_behind)
+            lot = ParkingLot(LEVELS, size // LEVELS, storage=storage)
+            latencies = _measure(lot, args.occupancy, args.exits, seed=size)
+            lot.close()
+            db.close_connections()
+        print(f"{size:>8} {_percentile(latencies, 0.5):>9.1f} {_percentile(latencies, 0.99):>9.1f} "
+              f"{latencies[-1]:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Memory benchmark: per-spot Python objects (previous layout) vs the columnar SpotStore
+# Usage: python benchmarks/bench_memory.py [--spots 1000000] [--occupancy 0.8]
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system.enums import SpotType, VehicleType  # noqa: E402
+from parking_lot_system.models import SpotViews  # noqa: E402
+from parking_lot_system.spot_store import SpotStore, to_epoch_us  # noqa: E402
+
+
+class _LegacyVehicle:
+    """Same attributes as the pre-SpotStore Vehicle objects."""
+
+    def __init__(self, license_plate, vehicle_type):
+        self.license_plate = license_plate
+        self.vehicle_type = vehicle_type
+        self.entry_time = None
+
+
+class _LegacySpot:
+    """Same attributes as the pre-SpotStore ParkingSpot objects."""
+
+    def __init__(self, number, level, spot_type):
+        self.number = number
+        self.level = level
+        self.spot_type = spot_type
+        self.is_occupied = False
+        self.vehicle = None
+        self.observer = None
+
+
+def _legacy_layout(count: int, occupied: int):
+    spots = [_LegacySpot(n, 1, SpotType.COMPACT) for n in range(1, count + 1)]
+    for spot in spots[:occupied]:
+        vehicle = _LegacyVehicle(f"P{spot.number}", VehicleType.CAR)
+        vehicle.entry_time = datetime.now()
+        spot.vehicle = vehicle
+        spot.is_occupied = True
+    return spots
+
+
+def _columnar_layout(count: int, occupied: int):
+    store = SpotStore(1)
+    store.extend(SpotType.COMPACT, 1, count)
+    for i in range(occupied):
+        store.occupied[i] = 1
+        store.set_vehicle(i, f"P{i + 1}", VehicleType.CAR, to_epoch_us(datetime.now()))
+    return store, SpotViews(store)  # what Level.spots holds: views are made on access
+
+
+def _measure(build, *args) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spot storage memory benchmark")
+    parser.add_argument('--spots', type=int, default=1_000_000)
+    parser.add_argument('--occupancy', type=float, default=0.8)
+    args = parser.parse_args()
+    occupied = int(args.spots * args.occupancy)
+
+    legacy = _measure(_legacy_layout, args.spots, occupied)
+    columnar = _measure(_columnar_layout, args.spots, occupied)
+
+    print(f"{args.spots} spots, {args.occupancy:.0%} occupied")
+    print(f"  per-spot objects   {legacy / 2**20:8.1f} MiB  ({legacy / args.spots:6.1f} B/spot)")
+    print(f"  SpotStore + views  {columnar / 2**20:8.1f} MiB  ({columnar / args.spots:6.1f} B/spot)")
+
+
+if __name__ == '__main__':
+    main()
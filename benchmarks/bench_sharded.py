@@ -0,0 +1,62 @@
+# Gate throughput: one in-process ParkingLot vs ShardedParkingLot with 1..N worker processes
+# Usage: python benchmarks/bench_sharded.py [--shards 1 2 4] [--gates 8] [--seconds 5]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system import ParkingLot, SQLiteStorage, Motorcycle  # noqa: E402
+from parking_lot_system.sharding import ShardedParkingLot  # noqa: E402
+
+
+def _gate(lot, gate: int, deadline: float, counts: list):
+    """One entry/exit gate: park then unpark its own vehicles until the deadline."""
+    n = 0
+    while time.perf_counter() < deadline:
+        ticket = lot.park_vehicle(Motorcycle(f"G{gate}-{n}"))
+        lot.unpark_vehicle(ticket)
+        n += 1
+    counts[gate] = 2 * n  # park + unpark
+
+
+def _run(lot, gates: int, seconds: float) -> float:
+    counts = [0] * gates
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=_gate, args=(lot, g, deadline, counts)) for g in range(gates)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate throughput vs number of shard processes")
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--gates', type=int, default=8, help='concurrent gate threads')
+    parser.add_argument('--levels', type=int, default=8)
+    parser.add_argument('--spots', type=int, default=200, help='spots per level')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--write-behind', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'mode':>14} {'ops/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        lot = ParkingLot(args.levels, args.spots, storage=SQLiteStorage(
+            os.path.join(tmp, 'single.db'), write_behind=args.write_behind))
+        print(f"{'in-process':>14} {_run(lot, args.gates, args.seconds):>10.0f}")
+        lot.close()
+
+        for shards in args.shards:
+            lot = ShardedParkingLot(args.levels, args.spots, num_shards=shards,
+                                    data_dir=os.path.join(tmp, f'shards_{shards}'), write_behind=args.write_behind)
+            print(f"{f'{shards} shard(s)':>14} {_run(lot, args.gates, args.seconds):>10.0f}")
+            lot.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# What-if simulation: replay synthetic traffic on a simulated clock for several spot distributions / prices
+# Usage: python benchmarks/bench_simulation.py [--days 30] [--levels 20] [--spots 500] [--peak-per-hour 3000]
+#        [--distribution 0.2 0.4 --distribution 0.1 0.5 ...] [--rate 10] [--daily-cap 60] [--json report.json]
+# Runs the production park/unpark path per event: the default month at 10k spots is ~1 minute per distribution
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system.billing import BillingEngine  # noqa: E402
+from parking_lot_system.config import SPOT_DISTRIBUTION, HOURLY_FEE_RATE  # noqa: E402
+from parking_lot_system.simulation import Simulation, poisson_arrivals  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discrete-event what-if runs against ParkingLot")
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--levels', type=int, default=20)
+    parser.add_argument('--spots', type=int, default=500, help='spots per level')
+    parser.add_argument('--peak-per-hour', type=float, default=3000, help='arrivals per hour at the daily peak')
+    parser.add_argument('--distribution', type=float, nargs=2, action='append', metavar=('MOTORCYCLE', 'COMPACT'),
+                        help='spot shares to try (LARGE gets the rest); repeatable, default config.SPOT_DISTRIBUTION')
+    parser.add_argument('--rate', type=float, help='flat hourly rate (default config.HOURLY_FEE_RATE)')
+    parser.add_argument('--daily-cap', type=float, help='max fee per started 24h')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the reports to this file')
+    args = parser.parse_args()
+
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(days=args.days)
+    arrivals = list(poisson_arrivals(start, end, args.peak_per_hour, seed=args.seed))  # same stream for every run
+    billing = BillingEngine.from_config()
+    if args.rate is not None or args.daily_cap is not None:
+        billing = BillingEngine(default_rate=args.rate if args.rate is not None else HOURLY_FEE_RATE,
+                                daily_cap=args.daily_cap)
+    distributions = [{'MOTORCYCLE': m, 'COMPACT': c, 'LARGE': round(1 - m - c, 6)} for m, c in args.distribution] \
+        if args.distribution else [SPOT_DISTRIBUTION]
+
+    print(f"{args.days:g} days, {args.levels * args.spots} spots, {len(arrivals)} arrivals (seed {args.seed})")
+    print(f"  {'M/C/L':>14} {'rejected':>9} {'M':>7} {'C':>7} {'B':>7} {'util':>6} {'peak':>7} "
+          f"{'revenue':>12} {'wall s':>7} {'events/s':>9}")
+    reports = []
+    for distribution in distributions:
+        report = Simulation(args.levels, args.spots, start, distribution=distribution,
+                            billing=billing).run(arrivals).as_dict()
+        report['distribution'] = distribution
+        reports.append(report)
+        shares = '/'.join(f"{distribution[t]:g}" for t in ('MOTORCYCLE', 'COMPACT', 'LARGE'))
+        rejected = report['rejected']
+        print(f"  {shares:>14} {report['rejection_rate']:9.2%} {rejected['MOTORCYCLE']:7} {rejected['CAR']:7} "
+              f"{rejected['BUS']:7} {report['avg_utilization']:6.1%} {report['peak_occupied']:7} "
+              f"{report['revenue']:12.2f} {report['wall_seconds']:7.1f} {report['events_per_second']:9}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# Cold-start benchmark: package import time, and time to construct a ParkingLot from an
+# existing, partly occupied store (eager, and lazy = counters only + time to the first park)
+# Usage: python benchmarks/bench_startup.py [--levels 100] [--spots 1000] [--occupancy 0.8]
+#        [--max-import-ms N] [--max-lazy-ms N]   (exit status 1 if a budget is exceeded, for CI)
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system import ParkingLot, SQLiteStorage, EventLogStorage, Car  # noqa: E402
+from parking_lot_system import db  # noqa: E402
+from parking_lot_system.enums import SpotType, VehicleType  # noqa: E402
+from parking_lot_system.events import ParkEvent  # noqa: E402
+
+# Vehicle type that fits each spot type exactly
+_FITTING_VEHICLE = {
+    SpotType.MOTORCYCLE: VehicleType.MOTORCYCLE,
+    SpotType.COMPACT: VehicleType.CAR,
+    SpotType.LARGE: VehicleType.BUS,
+}
+
+
+def _park_events(levels, occupancy: float):
+    """ParkEvents filling `occupancy` of every level, bypassing ParkingLot for speed."""
+    entry = datetime.now().isoformat()
+    events = []
+    for level in levels:
+        occupied = int(len(level.spots) * occupancy)
+        for spot in level.spots[:occupied]:
+            events.append(ParkEvent(level.level_id, spot.number, f"P{level.level_id}-{spot.number}",
+                                    _FITTING_VEHICLE[spot.spot_type].name, entry, str(uuid.uuid4())))
+    return events
+
+
+def _time_import(repeat: int) -> float:
+    """Best wall time of `import parking_lot_system` in a fresh interpreter, minus the interpreter's own start."""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+    def run(code: str) -> float:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    return max(0.0, run('import parking_lot_system') - run('pass'))
+
+
+def _time_startup(make_storage, num_levels: int, spots_per_level: int, repeat: int,
+                  lazy: bool = False) -> tuple:
+    """Best (construction, construction + first park) times."""
+    best_start = best_first = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        lot = ParkingLot(num_levels, spots_per_level, storage=make_storage(), lazy=lazy)
+        started = time.perf_counter()
+        ticket = lot.park_vehicle(Car(f"BENCH-{i}"))
+        best_start = min(best_start, started - start)
+        best_first = min(best_first, time.perf_counter() - start)
+        lot.unpark_vehicle(ticket)
+        lot.close()
+    return best_start, best_first
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ParkingLot cold-start benchmark")
+    parser.add_argument('--levels', type=int, default=100)
+    parser.add_argument('--spots', type=int, default=1000, help='spots per level')
+    parser.add_argument('--occupancy', type=float, default=0.8)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-import-ms', type=float, help='fail if the package import takes longer')
+    parser.add_argument('--max-lazy-ms', type=float, help='fail if a lazy SQLite start takes longer')
+    args = parser.parse_args()
+    total = args.levels * args.spots
+    import_s = _time_import(args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # SQLite backend
+        db_file = os.path.join(tmp, 'bench.db')
+        db.ensure_db(args.levels, args.spots, db_file)
+        levels = db.load_from_db(db_file)
+        db.save_events_to_db(_park_events(levels, args.occupancy), db_file)
+        db.close_connections(db_file)
+        sqlite_s = _time_startup(lambda: SQLiteStorage(db_file), args.levels, args.spots, args.repeat)
+        lazy_s = _time_startup(lambda: SQLiteStorage(db_file), args.levels, args.spots, args.repeat, lazy=True)
+
+        # Event log backend: snapshot holds the whole state
+        log_dir = os.path.join(tmp, 'eventlog')
+        storage = EventLogStorage(log_dir)
+        storage.load(args.levels, args.spots)
+        storage.save_events(_park_events(levels, args.occupancy))
+        storage.close()
+        eventlog_s = _time_startup(lambda: EventLogStorage(log_dir), args.levels, args.spots, args.repeat)
+
+    print(f"import parking_lot_system {import_s * 1000:8.1f} ms")
+    print(f"{total} spots, {args.occupancy:.0%} occupied (best of {args.repeat})")
+    print(f"  {'':22} {'start':>10} {'first park':>12}")
+    for name, (start_s, first_s) in (('SQLiteStorage', sqlite_s), ('SQLiteStorage lazy', lazy_s),
+                                     ('EventLogStorage', eventlog_s)):
+        print(f"  {name:22} {start_s * 1000:7.1f} ms {first_s * 1000:9.1f} ms")
+
+    failed = []
+    if args.max_import_ms is not None and import_s * 1000 > args.max_import_ms:
+        failed.append(f"import {import_s * 1000:.1f} ms > {args.max_import_ms} ms")
+    if args.max_lazy_ms is not None and lazy_s[0] * 1000 > args.max_lazy_ms:
+        failed.append(f"lazy start {lazy_s[0] * 1000:.1f} ms > {args.max_lazy_ms} ms")
+    if failed:
+        print("FAIL: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
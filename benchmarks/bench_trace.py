@@ -0,0 +1,250 @@
+# Trace-driven benchmark: replay a synthetic arrival/departure trace against the in-process
+# ParkingLot and/or the Flask API (test client) and report throughput, latency and peak memory as JSON.
+# Usage:
+#   python benchmarks/bench_trace.py --target all --ops 20000 --output run.json
+#   python benchmarks/bench_trace.py --target lot --compare run.json   # exit code 1 on regression
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from parking_lot_system import ParkingLot, SQLiteStorage, EventLogStorage, VehicleType  # noqa: E402
+from parking_lot_system.models import make_vehicle  # noqa: E402
+from parking_lot_system.exceptions import ParkingException  # noqa: E402
+
+TARGETS = ('lot', 'flask')
+DEFAULT_MIX = 'CAR=0.7,MOTORCYCLE=0.2,BUS=0.1'
+
+# One trace step: ('park', plate, VehicleType name) or ('unpark', plate, '')
+Step = Tuple[str, str, str]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        name = name.strip().upper()
+        if name not in VehicleType.__members__:
+            raise ValueError(f"Unknown vehicle type in mix: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def generate_trace(seed: int, ops: int, capacity: int, occupancy: float, mix: Dict[str, float]) -> List[Step]:
+    """
+    Deterministic trace for a given seed: arrivals until `occupancy` of `capacity` is parked,
+    then random arrivals/departures that keep the lot around that occupancy.
+    Departures name a plate that arrived earlier; a few duplicate arrivals are mixed in on purpose.
+    """
+    rng = random.Random(seed)
+    types, weights = list(mix), list(mix.values())
+    target = int(capacity * occupancy)
+    parked: List[str] = []
+    trace: List[Step] = []
+    next_plate = 0
+    while len(trace) < ops:
+        # Fill towards the target occupancy, then arrivals and departures are equally likely
+        arrive = not parked or rng.random() < (0.9 if len(parked) < target else 0.5)
+        if arrive:
+            if parked and rng.random() < 0.01:
+                trace.append(('park', rng.choice(parked), rng.choices(types, weights)[0]))  # duplicate plate
+                continue
+            plate = f"T{next_plate}"
+            next_plate += 1
+            parked.append(plate)
+            trace.append(('park', plate, rng.choices(types, weights)[0]))
+        else:
+            plate = parked.pop(rng.randrange(len(parked)))
+            trace.append(('unpark', plate, ''))
+    return trace
+
+
+class LotDriver:
+    """Calls ParkingLot directly."""
+
+    def __init__(self, lot: ParkingLot):
+        self.lot = lot
+
+    def park(self, plate: str, vehicle_type: str) -> Optional[str]:
+        try:
+            return self.lot.park_vehicle(make_vehicle(VehicleType[vehicle_type], plate))
+        except ParkingException:
+            return None
+
+    def unpark(self, ticket_id: str) -> bool:
+        try:
+            self.lot.unpark_vehicle(ticket_id)
+            return True
+        except ParkingException:
+            return False
+
+
+class FlaskDriver:
+    """Goes through the Flask routes in app.py with the test client (routing, JSON, status codes)."""
+
+    def __init__(self, lot: ParkingLot):
+        import app as app_module  # imported here: Flask is only needed for this target
+        app_module.lot.close()
+        app_module.lot = lot  # the routes use the module-level lot
+        self.client = app_module.app.test_client()
+
+    def park(self, plate: str, vehicle_type: str) -> Optional[str]:
+        response = self.client.post('/park', json={'vehicle_type': vehicle_type, 'license_plate': plate})
+        return response.get_json()['ticket_id'] if response.status_code == 201 else None
+
+    def unpark(self, ticket_id: str) -> bool:
+        return self.client.post('/unpark', json={'ticket_id': ticket_id}).status_code == 200
+
+
+def _percentiles(latencies_ns: List[int]) -> dict:
+    if not latencies_ns:
+        return {'count': 0}
+    ordered = sorted(latencies_ns)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000
+
+    return {'count': len(ordered), 'p50_us': pick(0.5), 'p99_us': pick(0.99),
+            'max_us': ordered[-1] / 1000, 'mean_us': sum(ordered) / len(ordered) / 1000}
+
+
+def _make_storage(kind: str, directory: str):
+    if kind == 'event-log':
+        return EventLogStorage(os.path.join(directory, 'eventlog'))
+    return SQLiteStorage(os.path.join(directory, 'bench.db'), write_behind=(kind == 'write-behind'))
+
+
+def run_target(target: str, args) -> dict:
+    mix = parse_mix(args.mix)
+    trace = generate_trace(args.seed, args.ops, args.levels * args.spots, args.occupancy, mix)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # app.py creates its default parking.db in the working directory
+        try:
+            lot = ParkingLot(args.levels, args.spots, storage=_make_storage(args.storage, tmp))
+            driver = FlaskDriver(lot) if target == 'flask' else LotDriver(lot)
+
+            tickets: Dict[str, str] = {}
+            latencies: Dict[str, List[int]] = {'park': [], 'unpark': []}
+            rejected = 0
+            began = time.perf_counter()
+            for op, plate, vehicle_type in trace:
+                start = time.perf_counter_ns()
+                if op == 'park':
+                    ticket = driver.park(plate, vehicle_type)
+                    ok = ticket is not None
+                    if ok:
+                        tickets[plate] = ticket
+                else:
+                    ticket = tickets.pop(plate, None)
+                    ok = ticket is not None and driver.unpark(ticket)
+                latencies[op].append(time.perf_counter_ns() - start)
+                rejected += not ok
+            lot.flush()
+            elapsed = time.perf_counter() - began
+            lot.close()
+        finally:
+            os.chdir(cwd)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_kib = peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+    return {
+        'target': target,
+        'ops': len(trace),
+        'rejected': rejected,
+        'seconds': elapsed,
+        'throughput_ops_s': len(trace) / elapsed,
+        'latency': {'all': _percentiles(latencies['park'] + latencies['unpark']),
+                    'park': _percentiles(latencies['park']),
+                    'unpark': _percentiles(latencies['unpark'])},
+        'peak_rss_kib': peak_rss_kib,
+    }
+
+
+def _run_isolated(target: str, args) -> dict:
+    """Run one target in a fresh interpreter so peak memory is not shared between targets."""
+    argv = ['--target', target, '--raw', '--ops', str(args.ops), '--levels', str(args.levels),
+            '--spots', str(args.spots), '--occupancy', str(args.occupancy), '--mix', args.mix,
+            '--storage', args.storage, '--seed', str(args.seed)]
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), *argv], capture_output=True, text=True)
+    if out.returncode != 0:  # e.g. Flask not installed: keep the other targets' results
+        error = (out.stderr.strip().splitlines() or ['unknown error'])[-1]
+        return {'target': target, 'error': error}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of throughput or p99 latency beyond tolerance (fraction) vs a baseline report."""
+    problems = []
+    base_by_target = {r['target']: r for r in baseline['results']}
+    for result in report['results']:
+        base = base_by_target.get(result['target'])
+        if base is None or 'error' in result or 'error' in base:
+            continue
+        if result['throughput_ops_s'] < base['throughput_ops_s'] * (1 - tolerance):
+            problems.append(f"{result['target']}: throughput {result['throughput_ops_s']:.0f} ops/s "
+                            f"vs baseline {base['throughput_ops_s']:.0f}")
+        p99, base_p99 = result['latency']['all'].get('p99_us'), base['latency']['all'].get('p99_us')
+        if p99 is not None and base_p99 and p99 > base_p99 * (1 + tolerance):
+            problems.append(f"{result['target']}: p99 {p99:.1f} us vs baseline {base_p99:.1f} us")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace-driven ParkingLot / REST API benchmark (JSON output)")
+    parser.add_argument('--target', choices=TARGETS + ('all',), default='lot')
+    parser.add_argument('--ops', type=int, default=20000, help='trace length (park + unpark steps)')
+    parser.add_argument('--levels', type=int, default=10)
+    parser.add_argument('--spots', type=int, default=500, help='spots per level')
+    parser.add_argument('--occupancy', type=float, default=0.85, help='steady-state occupancy of the trace')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='vehicle mix, e.g. CAR=0.7,MOTORCYCLE=0.2,BUS=0.1')
+    parser.add_argument('--storage', choices=('sqlite', 'write-behind', 'event-log'), default='sqlite')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report; exit code 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed regression vs baseline')
+    parser.add_argument('--raw', action='store_true', help=argparse.SUPPRESS)  # single result, used by --target all
+    args = parser.parse_args()
+
+    if args.raw:
+        print(json.dumps(run_target(args.target, args)))
+        return
+
+    targets = TARGETS if args.target == 'all' else (args.target,)
+    results = [_run_isolated(target, args) for target in targets]
+
+    report = {
+        'config': {key: getattr(args, key) for key in ('ops', 'levels', 'spots', 'occupancy', 'mix', 'storage', 'seed')},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        if problems:
+            print("REGRESSION", file=sys.stderr)
+            for problem in problems:
+                print("  -", problem, file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# Multithreaded stress check: many gates park/unpark on one shared ParkingLot.
+# Verifies there is no double allocation, no lost ticket and that storage matches memory.
+# Usage: python benchmarks/stress_concurrency.py [--threads 16] [--ops 2000] [--write-behind]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system import ParkingLot, SQLiteStorage, EventLogStorage, Car, Bus, Motorcycle  # noqa: E402
+from parking_lot_system import db  # noqa: E402
+from parking_lot_system.exceptions import ParkingFullException, VehicleAlreadyParkedException  # noqa: E402
+
+
+def _gate(lot: ParkingLot, gate_id: int, ops: int, issued: dict, redeemed: dict, errors: list, start: threading.Barrier):
+    rng = random.Random(gate_id)
+    held = []  # tickets this gate still has to redeem
+    start.wait()
+    try:
+        for i in range(ops):
+            if held and rng.random() < 0.45:
+                ticket = held.pop(rng.randrange(len(held)))
+                lot.unpark_vehicle(ticket)
+                redeemed[ticket] = gate_id
+                continue
+            vehicle_cls = rng.choice((Car, Car, Car, Motorcycle, Bus))
+            # Plates shared between gates on purpose so duplicate-plate races are exercised
+            plate = f"P{rng.randrange(ops * 2)}"
+            try:
+                ticket = lot.park_vehicle(vehicle_cls(plate))
+            except (ParkingFullException, VehicleAlreadyParkedException):
+                continue
+            issued[ticket] = (gate_id, plate)
+            held.append(ticket)
+    except Exception as e:  # surface failures from worker threads
+        errors.append(repr(e))
+
+
+def _check(lot: ParkingLot, issued: dict, redeemed: dict) -> list:
+    problems = []
+    outstanding = set(issued) - set(redeemed)
+    if set(lot.active_tickets) != outstanding:
+        problems.append(f"ticket mismatch: {len(lot.active_tickets)} active vs {len(outstanding)} outstanding")
+
+    spot_use = Counter(lot.active_tickets.values())
+    doubles = [spot for spot, n in spot_use.items() if n > 1]
+    if doubles:
+        problems.append(f"double allocation of spots: {doubles[:5]}")
+
+    plates = Counter(issued[t][1] for t in outstanding)
+    dup_plates = [p for p, n in plates.items() if n > 1]
+    if dup_plates:
+        problems.append(f"same plate parked twice: {dup_plates[:5]}")
+
+    for ticket in outstanding:
+        location = lot.find_vehicle(issued[ticket][1])
+        if location is None or location['ticket_id'] != ticket:
+            problems.append(f"plate index out of sync for ticket {ticket}")
+            break
+
+    occupied = sum(1 for level in lot.levels for spot in level.spots if spot.is_occupied)
+    if occupied != len(outstanding):
+        problems.append(f"{occupied} occupied spots vs {len(outstanding)} outstanding tickets")
+
+    for level in lot.levels:
+        for spot_type, free in level.get_available_count_by_type().items():
+            actual = sum(1 for s in level.spots if s.spot_type == spot_type and not s.is_occupied)
+            if free != actual:
+                problems.append(f"level {level.level_id} {spot_type.name}: counter {free} vs actual {actual}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ParkingLot concurrency stress check")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=2000, help='operations per thread')
+    parser.add_argument('--levels', type=int, default=4)
+    parser.add_argument('--spots', type=int, default=200, help='spots per level')
+    parser.add_argument('--write-behind', action='store_true')
+    parser.add_argument('--event-log', action='store_true', help='use EventLogStorage instead of SQLite')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def make_storage():
+            if args.event_log:
+                return EventLogStorage(os.path.join(tmp, 'eventlog'))
+            return SQLiteStorage(os.path.join(tmp, 'stress.db'), write_behind=args.write_behind)
+
+        lot = ParkingLot(args.levels, args.spots, storage=make_storage())
+        issued, redeemed, errors = {}, {}, []
+        start = threading.Barrier(args.threads)
+        threads = [
+            threading.Thread(target=_gate, args=(lot, g, args.ops, issued, redeemed, errors, start))
+            for g in range(args.threads)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        problems = errors + _check(lot, issued, redeemed)
+        lot.close()
+
+        # Storage must reload to exactly the same state
+        reloaded = ParkingLot(args.levels, args.spots, storage=make_storage())
+        if reloaded.active_tickets != lot.active_tickets:
+            problems.append("state reloaded from storage differs from memory")
+        reloaded.close()
+        db.close_connections()
+
+    print(f"{args.threads} threads x {args.ops} ops: {len(issued)} parked, {len(redeemed)} unparked")
+    if problems:
+        print("FAILED")
+        for problem in problems:
+            print("  -", problem)
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,50 @@
 __version__ = "1.0.0"
 
-from .parking_lot import ParkingLot
-from .models import Vehicle, Car, Bus, Motorcycle
-from .enums import VehicleType, SpotType
-from .db import *
+import importlib
 
-__all__ = [
-    "ParkingLot",
-    "Vehicle",
-    "Car",
-    "Bus",
-    "Motorcycle",
-    "VehicleType",
-    "SpotType",
-]
\ No newline at end of file
+# Public names are imported on first access (PEP 562), so `import parking_lot_system`
+# or importing one submodule (config, exceptions, ...) doesn't load SQLite, the
+# event log, billing or metrics. name -> submodule that defines it
+_EXPORTS = {
+    "ParkingLot": "parking_lot",
+    "Vehicle": "models",
+    "Car": "models",
+    "Bus": "models",
+    "Motorcycle": "models",
+    "VehicleType": "enums",
+    "SpotType": "enums",
+    "PlacementPolicy": "placement",
+    "LowestLevelFirst": "placement",
+    "BestFit": "placement",
+    "BalancedLoad": "placement",
+    "StorageBackend": "storage",
+    "SQLiteStorage": "storage",
+    "InMemoryStorage": "storage",
+    "EventLogStorage": "event_log",
+    "BillingEngine": "billing",
+    "RateTier": "billing",
+    "Instrumentation": "instrumentation",
+    "LoggingInstrumentation": "instrumentation",
+    "MetricsInstrumentation": "metrics",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        if name.startswith('_'):
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        # The package used to re-export db's names (`from .db import *`); keep them reachable
+        module = 'db'
+    try:
+        value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
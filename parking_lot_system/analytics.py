@@ -0,0 +1,109 @@
+# Streaming analytics over the completed-session archive: hourly occupancy, dwell percentiles, peak hours
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence
+
+from .events import CompletedSession
+from .instrumentation import Histogram
+
+HOUR = timedelta(hours=1)
+
+# Dwell-time histogram bucket upper bounds (seconds): 5 minutes .. 7 days, then +Inf
+DWELL_BUCKETS = (300, 600, 900, 1800, 2700, 3600, 5400, 7200, 10800, 14400,
+                 21600, 28800, 43200, 86400, 172800, 604800)
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _hour_floor(t: datetime) -> datetime:
+    return t.replace(minute=0, second=0, microsecond=0)
+
+
+def hourly_occupancy(sessions: Iterable[CompletedSession], start: datetime, end: datetime) -> List[dict]:
+    """
+    Per clock hour in [start, end) (start rounded down to the hour): average number of
+    parked vehicles, arrivals and departures.
+    Sessions are consumed one at a time and each adds its overlap to the hours it spans,
+    so memory is O(hours), whatever the number of sessions. Only completed (archived)
+    sessions count; vehicles still parked are not included.
+    """
+    start = _hour_floor(start)
+    hours = max(0, math.ceil((end - start) / HOUR))
+    seconds = [0.0] * hours
+    arrivals = [0] * hours
+    departures = [0] * hours
+
+    for session in sessions:
+        entry = datetime.fromisoformat(session.entry_time)
+        exit_time = datetime.fromisoformat(session.exit_time)
+        if start <= entry < end:
+            arrivals[int((entry - start) / HOUR)] += 1
+        if start <= exit_time < end:
+            departures[int((exit_time - start) / HOUR)] += 1
+
+        lo, hi = max(entry, start), min(exit_time, end)
+        i = int((lo - start) / HOUR)
+        while lo < hi:
+            boundary = min(start + (i + 1) * HOUR, hi)
+            seconds[i] += (boundary - lo).total_seconds()
+            lo, i = boundary, i + 1
+
+    return [{'hour': (start + i * HOUR).isoformat(), 'avg_occupied': round(seconds[i] / 3600, 3),
+             'arrivals': arrivals[i], 'departures': departures[i]} for i in range(hours)]
+
+
+def _summary(histogram: Histogram, quantiles: Sequence[float]) -> dict:
+    """count, mean and quantiles in minutes; a quantile is its bucket's upper bound (None past the last bucket)."""
+    if histogram.count == 0:
+        return {'count': 0}
+    percentiles = {}
+    for q in quantiles:
+        bound = histogram.percentile(q)
+        percentiles[f"p{q * 100:g}"] = None if math.isinf(bound) else bound / 60
+    return {'count': histogram.count, 'mean_minutes': round(histogram.sum / histogram.count / 60, 2),
+            'percentiles_minutes': percentiles}
+
+
+def dwell_percentiles(sessions: Iterable[CompletedSession],
+                      quantiles: Sequence[float] = DEFAULT_QUANTILES) -> dict:
+    """
+    Dwell-time distribution of the sessions, overall and per vehicle type.
+    Uses fixed-bucket histograms (DWELL_BUCKETS), so percentiles are bucket upper
+    bounds and memory does not grow with the number of sessions.
+    """
+    overall = Histogram(DWELL_BUCKETS)
+    by_type: Dict[str, Histogram] = {}
+    for session in sessions:
+        dwell = (datetime.fromisoformat(session.exit_time)
+                 - datetime.fromisoformat(session.entry_time)).total_seconds()
+        overall.observe(dwell)
+        histogram = by_type.get(session.vehicle_type)
+        if histogram is None:
+            histogram = by_type[session.vehicle_type] = Histogram(DWELL_BUCKETS)
+        histogram.observe(dwell)
+
+    report = _summary(overall, quantiles)
+    report['by_vehicle_type'] = {name: _summary(h, quantiles) for name, h in sorted(by_type.items())}
+    return report
+
+
+def peak_hours(sessions: Iterable[CompletedSession], start: datetime, end: datetime, top: int = 3) -> dict:
+    """
+    Busiest hours in [start, end): the `top` clock hours with the highest average occupancy,
+    and the average occupancy / arrivals for each hour of the day (0-23) across the range.
+    """
+    hourly = hourly_occupancy(sessions, start, end)
+    occupied = [0.0] * 24
+    arrivals = [0] * 24
+    days = [0] * 24
+    for bucket in hourly:
+        hour = datetime.fromisoformat(bucket['hour']).hour
+        occupied[hour] += bucket['avg_occupied']
+        arrivals[hour] += bucket['arrivals']
+        days[hour] += 1
+
+    return {
+        'peaks': sorted(hourly, key=lambda b: (-b['avg_occupied'], b['hour']))[:top],
+        'by_hour_of_day': [{'hour': h, 'avg_occupied': round(occupied[h] / days[h], 3) if days[h] else 0.0,
+                            'avg_arrivals': round(arrivals[h] / days[h], 3) if days[h] else 0.0}
+                           for h in range(24)],
+    }
@@ -0,0 +1,95 @@
+# asyncio facade over ParkingLot
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Union
+
+from .models import Vehicle
+from .snapshot import AvailabilitySnapshot
+from .exceptions import ParkingException
+from .parking_lot import ParkingLot
+
+DEFAULT_IO_WORKERS = 8  # threads available for blocking storage I/O
+
+
+class AsyncParkingLot:
+    """
+    Async wrapper around a (thread-safe) ParkingLot.
+    park/unpark may block on storage I/O, so they run in a thread pool and the
+    event loop stays free to hold thousands of idle connections.
+    get_parking_status and find_vehicle only read in-memory state and run inline
+    (except a lazy lot's first find_vehicle, which loads it from storage in the pool).
+    """
+
+    def __init__(self, lot: ParkingLot, executor: Optional[ThreadPoolExecutor] = None):
+        self.lot = lot
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=DEFAULT_IO_WORKERS,
+                                                        thread_name_prefix="parking-io")
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def park_vehicle(self, vehicle: Vehicle) -> str:
+        return await self._run(self.lot.park_vehicle, vehicle)
+
+    async def unpark_vehicle(self, ticket_id: str) -> str:
+        return await self._run(self.lot.unpark_vehicle, ticket_id)
+
+    async def park_many(self, vehicles: List[Vehicle]) -> List[Union[str, ParkingException]]:
+        return await self._run(self.lot.park_many, vehicles)
+
+    async def unpark_many(self, ticket_ids: List[str]) -> List[Union[str, ParkingException]]:
+        return await self._run(self.lot.unpark_many, ticket_ids)
+
+    async def find_vehicle(self, license_plate: str) -> Optional[dict]:
+        if not self.lot.hydrated:
+            return await self._run(self.lot.find_vehicle, license_plate)
+        return self.lot.find_vehicle(license_plate)
+
+    async def get_parking_status(self) -> dict:
+        return self.lot.get_parking_status()
+
+    async def wait_for_availability(self, since_version: int, timeout: float) -> AvailabilitySnapshot:
+        """
+        AvailabilityFeed.wait_for_change without tying up a thread: the feed wakes this
+        coroutine through the event loop, so thousands of long polls cost no pool workers.
+        """
+        feed = self.lot.availability
+        snapshot = feed.current()
+        if snapshot.version != since_version or timeout <= 0:
+            return snapshot
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass  # loop already closed: nobody left to wake
+
+        deadline = loop.time() + timeout
+        feed.add_listener(wake)
+        try:
+            while True:
+                changed.clear()  # before re-reading, so a change from here on sets it again
+                snapshot = feed.current()
+                remaining = deadline - loop.time()
+                if snapshot.version != since_version or remaining <= 0:
+                    return snapshot
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            feed.remove_listener(wake)
+
+    async def flush(self):
+        await self._run(self.lot.flush)
+
+    async def close(self):
+        """Flush and close the lot, then shut down the I/O pool if we created it."""
+        await self._run(self.lot.close)
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,51 @@
+# Injectable time source and ticket/reservation ID generators (real by default, simulated for what-if runs)
+import itertools
+import uuid
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """Where ParkingLot gets "now" from. The default reads the wall clock."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class SimulatedClock(Clock):
+    """
+    A clock that only moves when told to (set / advance), for simulations and
+    reproducible runs. Naive datetimes, like datetime.now().
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime):
+        if when < self._now:
+            raise ValueError(f"Simulated time can't go backwards ({when} < {self._now})")
+        self._now = when
+
+    def advance(self, delta: timedelta):
+        self.set(self._now + delta)
+
+
+def uuid_ids() -> str:
+    """Default ID generator: random UUID4 strings."""
+    return str(uuid.uuid4())
+
+
+class SequentialIds:
+    """Deterministic ID generator: '<prefix>1', '<prefix>2', ... (thread-safe: count() is atomic)."""
+
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self._counter = itertools.count(1)
+
+    def __call__(self) -> str:
+        return f"{self.prefix}{next(self._counter)}"
@@ -2,8 +2,50 @@
 # Configuration file for easy tweaks
 HOURLY_FEE_RATE = 10.0  # $ per hour
 
+# Billing (see billing.BillingEngine); the defaults keep the flat HOURLY_FEE_RATE
+VEHICLE_HOURLY_RATES = {}   # e.g. {'BUS': 25.0, 'MOTORCYCLE': 5.0}; missing types use HOURLY_FEE_RATE
+RATE_TIERS = []             # (start_hour, end_hour, multiplier), e.g. [(0, 6, 0.5)] for half-price nights
+DAILY_FEE_CAP = None        # max $ per started 24h period, None = no cap
+GRACE_PERIOD_MINUTES = 0    # stays this short are free
+
 SPOT_DISTRIBUTION = {
     'MOTORCYCLE': 0.2,  # 20%
     'COMPACT': 0.4,     # 40%
     'LARGE': 0.4,       # 40%
-}
\ No newline at end of file
+}
+
+# Write-behind persistence (park/unpark events are group-committed by a background thread)
+WRITE_BEHIND = False                 # default mode for ParkingLot(write_behind=None)
+WRITE_BEHIND_BATCH_SIZE = 100        # commit once this many events are queued...
+WRITE_BEHIND_FLUSH_INTERVAL_MS = 50  # ...or this long after the first queued event
+WRITE_BEHIND_MAX_PENDING = 1000      # durability bound: max acknowledged events not yet committed
+
+# Lazy startup: boot from per-level counters, load spots/tickets on the first park/unpark/find
+LAZY_LOAD = False                    # default mode for ParkingLot(lazy=None)
+
+# Multi-facility hosting (see facilities.FacilityRegistry): one SQLite file per facility in FACILITY_DATA_DIR
+# app.py serves its default lot (parking.db) as facility 'main'; add other garages here, e.g.
+# 'north': {'num_levels': 4, 'spots_per_level': 200}
+FACILITIES = {}                      # facility id -> layout
+FACILITY_DATA_DIR = 'facilities'
+FACILITY_IDLE_SECONDS = 600          # close a facility's lot after this long without requests (None = never)
+FACILITY_MAX_LOADED = 32             # at most this many lots in memory; least recently used are closed first
+
+# Availability readers (GET /availability?since=..., /availability/stream)
+AVAILABILITY_LONG_POLL_SECONDS = 30  # max wait of one long poll (also the SSE keep-alive interval)
+AVAILABILITY_STREAM_SECONDS = 300    # SSE streams end after this; clients reconnect with Last-Event-ID
+
+# API responses (see serialization.py)
+JSON_ENCODER = 'auto'                # 'orjson' (if installed), 'json', or 'auto' = orjson when available
+GZIP_MIN_BYTES = 512                 # compress responses at least this large for clients accepting gzip
+GZIP_LEVEL = 6
+
+# Session archive queries (GET /sessions)
+SESSIONS_PAGE_LIMIT = 1000           # max sessions returned by one request
+ANALYTICS_MAX_RANGE_DAYS = 366       # longest ?start=&end= range (analytics keep per-hour arrays over it)
+
+# Reservations (see reservations.ReservationBook)
+RESERVATION_BUCKET_MINUTES = 15         # hold counts are kept per bucket; windows are rounded outwards to buckets
+RESERVATION_EARLY_ARRIVAL_MINUTES = 15  # a booked vehicle arriving this early still gets its held spot
+RESERVATION_WALK_IN_MINUTES = 180       # expected walk-in stay: holds starting this soon are already kept free
+RESERVABLE_SHARE = 0.5                  # at most this share of each level's spots of a type can be booked at once
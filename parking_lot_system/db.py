@@ -1,26 +1,104 @@
 import sqlite3
+import threading
+import weakref
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 
-from .models import ParkingSpot, Vehicle, Motorcycle, Car, Bus
+from .models import Vehicle, TicketEntry
+from .spot_store import SpotStore, to_epoch_us
 from .enums import VehicleType, SpotType
 from .exceptions import SpotNotFoundException, InvalidTicketException
 from .level import Level   # assuming Level is in level.py
+from .events import ParkEvent, UnparkEvent, ParkingEvent, CompletedSession
+from .reservations import Reservation
 
 DB_FILE = 'parking.db'
 
-def get_connection():
-    conn = sqlite3.connect(DB_FILE)
+# Applied once to every new connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers don't block the writer, commits append to the WAL
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints instead of every commit (safe with WAL)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache per connection
+    "PRAGMA busy_timeout=5000",     # wait up to 5s for a lock instead of failing immediately
+)
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection (sqlite3 caches by SQL text)
+
+# Connections are opened once per thread and reused for every call.
+# Each thread's {db_file: connection} dict lives in a _ThreadConnections holder that only
+# the thread-local references: when the thread ends, the holder is collected and a finalizer
+# closes its connections (thread-per-request servers would otherwise leak one per request).
+# _holders (weak) lets close_connections() close one file's connections in all live threads.
+class _ThreadConnections:
+    __slots__ = ('connections', '__weakref__')
+
+    def __init__(self):
+        self.connections: Dict[str, sqlite3.Connection] = {}
+
+def _close_all(connections: Dict[str, sqlite3.Connection]):
+    with _registry_lock:
+        while connections:
+            connections.popitem()[1].close()
+
+_local = threading.local()
+_holders: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+_registry_lock = threading.RLock()  # RLock: a finalizer may run (via GC) while this thread holds it
+
+def _open_connection(db_file: str) -> sqlite3.Connection:
+    # check_same_thread=False only so close_connections() can close it; each connection is used by one thread
+    conn = sqlite3.connect(db_file, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
     conn.row_factory = sqlite3.Row  # Allows row['column_name'] access
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def initialize_db(num_levels: int, spots_per_level: int) -> List[Level]:
+def get_connection(db_file: Optional[str] = None):
+    """
+    Return this thread's persistent connection to db_file (defaults to DB_FILE).
+    The connection is opened (and pragmas applied) on first use and reused afterwards,
+    so callers must NOT close it - commit or rollback instead.
+    """
+    db_file = db_file or DB_FILE
+    holder = getattr(_local, 'holder', None)
+    if holder is None:
+        holder = _local.holder = _ThreadConnections()
+        weakref.finalize(holder, _close_all, holder.connections)
+        with _registry_lock:
+            _holders.add(holder)
+    connections = holder.connections
+
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = _open_connection(db_file)
+        with _registry_lock:  # close_connections() pops from this dict from other threads
+            connections[db_file] = conn
+    return conn
+
+def close_connections(db_file: Optional[str] = None):
+    """
+    Close the connections to db_file in every thread (all files if None);
+    connections to other files stay open. The next get_connection() reopens.
+    """
+    with _registry_lock:
+        for holder in list(_holders):
+            connections = holder.connections
+            for conn_file in [f for f in connections if db_file is None or f == db_file]:
+                connections.pop(conn_file).close()
+
+def initialize_db(num_levels: int, spots_per_level: int, db_file: Optional[str] = None) -> List[Level]:
     """
     Create tables if they don't exist.
     Populate levels and spots ONLY if the database is empty.
     Then always load the current state from DB.
     """
-    conn = get_connection()
+    ensure_db(num_levels, spots_per_level, db_file)
+
+    # Always load current state
+    return load_from_db(db_file)
+
+def ensure_db(num_levels: int, spots_per_level: int, db_file: Optional[str] = None):
+    """Create tables and indexes if missing; populate levels and spots if the database is empty."""
+    conn = get_connection(db_file)
     cursor = conn.cursor()
 
     # Create tables (safe to run multiple times)
@@ -56,111 +134,171 @@ def initialize_db(num_levels: int, spots_per_level: int) -> List[Level]:
             FOREIGN KEY (spot_id) REFERENCES spots(id)
         )
     ''')
+    # Session archive: one row appended per unpark, in the same transaction; never updated
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS completed_sessions (
+            id INTEGER PRIMARY KEY,
+            ticket_id TEXT NOT NULL,
+            license_plate TEXT NOT NULL,
+            vehicle_type TEXT NOT NULL,
+            level_id INTEGER NOT NULL,
+            spot_number INTEGER NOT NULL,
+            entry_time DATETIME NOT NULL,
+            exit_time DATETIME NOT NULL,
+            fee REAL
+        )
+    ''')
+    # Future spot holds (reservations.ReservationBook); rows are deleted on check-in, cancel or expiry
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reservations (
+            reservation_id TEXT PRIMARY KEY,
+            license_plate TEXT NOT NULL,
+            level_id INTEGER NOT NULL,
+            spot_type TEXT NOT NULL,
+            start_time DATETIME NOT NULL,
+            end_time DATETIME NOT NULL,
+            FOREIGN KEY (level_id) REFERENCES levels(id)
+        )
+    ''')
+    # (level_id, number) lookups on park and the ordered bulk load; ticket join on load
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_spots_level_number ON spots(level_id, number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_active_tickets_spot ON active_tickets(spot_id)")
+    # Time-range scans for analytics and per-plate history
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_exit ON completed_sessions(exit_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_entry ON completed_sessions(entry_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_plate ON completed_sessions(license_plate, exit_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservations_end ON reservations(end_time)")
 
     # Check if levels already exist
     cursor.execute("SELECT COUNT(*) FROM levels")
     if cursor.fetchone()[0] == 0:
         # First-time initialization
         levels_list = [Level(i + 1, spots_per_level) for i in range(num_levels)]
-        for level in levels_list:
-            cursor.execute(
-                "INSERT INTO levels (id, capacity) VALUES (?, ?)",
-                (level.level_id, spots_per_level)
-            )
-            for spot in level.spots:
-                cursor.execute("""
-                    INSERT INTO spots (level_id, number, type, occupied)
-                    VALUES (?, ?, ?, ?)
-                """, (level.level_id, spot.number, spot.spot_type.name, 0))
+        cursor.executemany(
+            "INSERT INTO levels (id, capacity) VALUES (?, ?)",
+            ((level.level_id, spots_per_level) for level in levels_list)
+        )
+        cursor.executemany("""
+            INSERT INTO spots (level_id, number, type, occupied)
+            VALUES (?, ?, ?, ?)
+        """, ((level.level_id, spot.number, spot.spot_type.name, 0)
+              for level in levels_list for spot in level.spots))
         conn.commit()
         print(f"Initialized database with {num_levels} levels and {spots_per_level} spots per level.")
 
-    conn.close()
-
-    # Always load current state
-    return load_from_db()
-
-def load_from_db() -> List[Level]:
-    """Load all data from database into memory structures."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Load levels
-    cursor.execute("SELECT * FROM levels ORDER BY id")
-    level_rows = cursor.fetchall()
-    if not level_rows:
-        conn.close()
-        raise ValueError("No levels found in database. Database may be corrupted.")
-
-    levels = []
-    level_map: Dict[int, Level] = {}
-    for row in level_rows:
-        level = Level(row['id'], row['capacity'])
-        level.spots = []
-        levels.append(level)
-        level_map[row['id']] = level
-
-    # Load spots and attach to correct level
-    cursor.execute("SELECT * FROM spots ORDER BY level_id, number")
-    for row in cursor.fetchall():
-        try:
-            spot_type = SpotType[row['type']]
-        except KeyError:
-            print(f"Warning: Unknown spot type '{row['type']}' in DB - skipping spot")
+# Single streaming query for the whole lot state, in (level, spot number) order
+_LOAD_STATE_SQL = """
+    SELECT l.id, l.capacity, s.id, s.number, s.type, s.occupied,
+           pv.license_plate, pv.vehicle_type, pv.entry_time, at.ticket_id
+    FROM levels l
+    LEFT JOIN spots s ON s.level_id = l.id
+    LEFT JOIN parked_vehicles pv ON pv.spot_id = s.id
+    LEFT JOIN active_tickets at ON at.spot_id = s.id
+    ORDER BY l.id, s.number
+"""
+
+def load_state(db_file: Optional[str] = None) -> Tuple[List[Level], Dict[str, TicketEntry]]:
+    """
+    Load levels, spots, parked vehicles and active tickets with ONE joined query,
+    streamed row by row (no fetchall). Returns (levels, {ticket_id: TicketEntry}).
+    """
+    cursor = get_connection(db_file).cursor()
+    cursor.row_factory = None  # plain tuples: much cheaper than sqlite3.Row for bulk reads
+    cursor.execute(_LOAD_STATE_SQL)
+
+    spot_types = SpotType.__members__
+    vehicle_types = VehicleType.__members__
+    levels: List[Level] = []
+    tickets: Dict[str, TicketEntry] = {}
+
+    current_id = None
+    capacity = 0
+    store: Optional[SpotStore] = None
+    for (level_id, level_capacity, spot_id, number, type_name, occupied,
+         plate, vehicle_type_name, entry_time, ticket_id) in cursor:
+        if level_id != current_id:
+            if current_id is not None:
+                levels.append(Level(current_id, capacity, store=store))
+            current_id, capacity, store = level_id, level_capacity, SpotStore(level_id)
+        if number is None:
+            continue  # level without spots
+
+        spot_type = spot_types.get(type_name)
+        if spot_type is None:
+            print(f"Warning: Unknown spot type '{type_name}' in DB - skipping spot")
             continue
+        i = store.append(number, spot_type, spot_id)  # rows go straight into the level's columns
+        if occupied:
+            store.occupied[i] = 1
+
+        if plate is not None:
+            vtype = vehicle_types.get(vehicle_type_name)
+            if vtype is None:
+                print(f"Warning: Unknown vehicle_type '{vehicle_type_name}' in DB - skipping")
+            elif occupied:
+                store.set_vehicle(i, plate, vtype, to_epoch_us(datetime.fromisoformat(entry_time)))
+        if ticket_id is not None:
+            tickets[ticket_id] = TicketEntry(level_id, number, i, spot_id)
+
+    if current_id is None:
+        raise ValueError("No levels found in database. Database may be corrupted.")
+    levels.append(Level(current_id, capacity, store=store))  # Level() builds its free-spot index
+    return levels, tickets
 
-        spot = ParkingSpot(row['number'], row['level_id'], spot_type)
-        spot.is_occupied = bool(row['occupied'])
-        level_map[row['level_id']].spots.append(spot)
-
-    # Load parked vehicles
-    vehicle_map: Dict[int, Vehicle] = {}
-    cursor.execute("SELECT * FROM parked_vehicles")
-    for row in cursor.fetchall():
-        try:
-            vtype = VehicleType[row['vehicle_type']]
-        except KeyError:
-            print(f"Warning: Unknown vehicle_type '{row['vehicle_type']}' in DB - skipping")
-            continue
+def load_level_counts(db_file: Optional[str] = None) -> List[Tuple[int, Dict[SpotType, int], Dict[SpotType, int]]]:
+    """
+    Per-level (level_id, {SpotType: free}, {SpotType: occupied}) in level order, aggregated
+    by SQLite: no spot rows reach Python (lazy ParkingLot startup).
+    """
+    cursor = get_connection(db_file).cursor()
+    cursor.row_factory = None
+    cursor.execute("""
+        SELECT l.id, s.type, COUNT(s.id), COALESCE(SUM(s.occupied), 0)
+        FROM levels l
+        LEFT JOIN spots s ON s.level_id = l.id
+        GROUP BY l.id, s.type
+        ORDER BY l.id
+    """)
+    counts: List[Tuple[int, Dict[SpotType, int], Dict[SpotType, int]]] = []
+    for level_id, type_name, total, occupied in cursor:
+        if not counts or counts[-1][0] != level_id:
+            counts.append((level_id, {}, {}))
+        spot_type = SpotType.__members__.get(type_name)
+        if spot_type is not None:  # None: level without spots, or an unknown type (skipped as in load_state)
+            counts[-1][1][spot_type] = total - occupied
+            counts[-1][2][spot_type] = occupied
+    if not counts:
+        raise ValueError("No levels found in database. Database may be corrupted.")
+    return counts
 
-        if vtype == VehicleType.MOTORCYCLE:
-            vehicle = Motorcycle(row['license_plate'])
-        elif vtype == VehicleType.CAR:
-            vehicle = Car(row['license_plate'])
-        elif vtype == VehicleType.BUS:
-            vehicle = Bus(row['license_plate'])
-        else:
-            continue
+def load_from_db(db_file: Optional[str] = None) -> List[Level]:
+    """Load all data from database into memory structures."""
+    return load_state(db_file)[0]
 
-        vehicle.entry_time = datetime.fromisoformat(row['entry_time'])
-        vehicle_map[row['spot_id']] = vehicle
+def load_active_tickets(db_file: Optional[str] = None) -> Dict[str, Tuple[int, int]]:
+    """Load active tickets as {ticket_id: (level_id, spot_number)}."""
+    cursor = get_connection(db_file).cursor()
+    tickets: Dict[str, Tuple[int, int]] = {}
 
-    # Attach vehicles to spots (only occupied ones)
-    cursor.execute("SELECT id, level_id, number FROM spots WHERE occupied = 1")
-    for row in cursor.fetchall():
+    cursor.execute("""
+        SELECT at.ticket_id, s.level_id, s.number
+        FROM active_tickets at
+        JOIN spots s ON at.spot_id = s.id
+    """)
+    for row in cursor:
+        tickets[row['ticket_id']] = (row['level_id'], row['number'])
+
+    return tickets
+
+def _write_park(cursor: sqlite3.Cursor, event: ParkEvent):
+    """Apply a park event inside the caller's transaction."""
+    spot_id = event.spot_id
+    if spot_id is None:  # caller didn't know the row id: look it up
+        cursor.execute("SELECT id FROM spots WHERE level_id=? AND number=?", (event.level_id, event.spot_num))
+        row = cursor.fetchone()
+        if not row:
+            raise SpotNotFoundException("Spot not found in database")
         spot_id = row['id']
-        if spot_id in vehicle_map:
-            level = level_map[row['level_id']]
-            spot = next((s for s in level.spots if s.number == row['number']), None)
-            if spot:
-                spot.vehicle = vehicle_map[spot_id]
-                spot.is_occupied = True  # enforce consistency
-
-    conn.close()
-    return levels
-
-def save_park_to_db(level_id: int, spot_num: int, vehicle: Vehicle, ticket_id: str):
-    """Save parking action to database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Get spot_id
-    cursor.execute("SELECT id FROM spots WHERE level_id=? AND number=?", (level_id, spot_num))
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
-        raise SpotNotFoundException("Spot not found in database")
-    spot_id = row['id']
 
     # Update spot
     cursor.execute("UPDATE spots SET occupied=1 WHERE id=?", (spot_id,))
@@ -170,47 +308,140 @@ def save_park_to_db(level_id: int, spot_num: int, vehicle: Vehicle, ticket_id: s
         INSERT OR REPLACE INTO parked_vehicles 
         (spot_id, license_plate, vehicle_type, entry_time) 
         VALUES (?, ?, ?, ?)
-    """, (spot_id, vehicle.license_plate, vehicle.vehicle_type.name, vehicle.entry_time.isoformat()))
+    """, (spot_id, event.license_plate, event.vehicle_type, event.entry_time))
 
     # Save ticket
     cursor.execute("INSERT INTO active_tickets (ticket_id, spot_id) VALUES (?, ?)",
-                   (ticket_id, spot_id))
-
-    conn.commit()
-    conn.close()
-
-def save_unpark_to_db(ticket_id: str):
-    """Remove parking data from database on unpark."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Find spot_id from ticket
-        cursor.execute("SELECT spot_id FROM active_tickets WHERE ticket_id = ?", (ticket_id,))
+                   (event.ticket_id, spot_id))
+
+# Copies the parked vehicle row (plus the exit) into the archive before it is deleted
+_ARCHIVE_SESSION_SQL = """
+    INSERT INTO completed_sessions
+        (ticket_id, license_plate, vehicle_type, level_id, spot_number, entry_time, exit_time, fee)
+    SELECT ?, pv.license_plate, pv.vehicle_type, s.level_id, s.number, pv.entry_time, ?, ?
+    FROM parked_vehicles pv JOIN spots s ON s.id = pv.spot_id
+    WHERE pv.spot_id = ?
+"""
+
+def _write_unpark(cursor: sqlite3.Cursor, event: UnparkEvent):
+    """Apply an unpark event inside the caller's transaction."""
+    spot_id = event.spot_id
+    if spot_id is None:  # caller didn't know the row id: find it from the ticket
+        cursor.execute("SELECT spot_id FROM active_tickets WHERE ticket_id = ?", (event.ticket_id,))
         row = cursor.fetchone()
         if not row:
-            raise InvalidTicketException(f"Ticket {ticket_id} not found in database")
-
+            raise InvalidTicketException(f"Ticket {event.ticket_id} not found in database")
         spot_id = row['spot_id']
 
-        # Begin transaction explicitly for safety
-        cursor.execute("BEGIN")
+    # Delete ticket (its rowcount doubles as the existence check when spot_id was given)
+    cursor.execute("DELETE FROM active_tickets WHERE ticket_id = ?", (event.ticket_id,))
+    if cursor.rowcount == 0:
+        raise InvalidTicketException(f"Ticket {event.ticket_id} not found in database")
+
+    # Update spot
+    cursor.execute("UPDATE spots SET occupied = 0 WHERE id = ?", (spot_id,))
+
+    # Archive the session, then delete the vehicle
+    cursor.execute(_ARCHIVE_SESSION_SQL, (event.ticket_id, event.exit_time or datetime.now().isoformat(),
+                                          event.fee, spot_id))
+    cursor.execute("DELETE FROM parked_vehicles WHERE spot_id = ?", (spot_id,))
+
+def is_plate_parked(license_plate: str, db_file: Optional[str] = None) -> bool:
+    cursor = get_connection(db_file).cursor()
+    cursor.execute("SELECT 1 FROM parked_vehicles WHERE license_plate = ?", (license_plate,))
+    return cursor.fetchone() is not None
 
-        # Update spot
-        cursor.execute("UPDATE spots SET occupied = 0 WHERE id = ?", (spot_id,))
+def save_park_to_db(level_id: int, spot_num: int, vehicle: Vehicle, ticket_id: str,
+                    db_file: Optional[str] = None):
+    """Save parking action to database."""
+    conn = get_connection(db_file)
+    try:
+        _write_park(conn.cursor(), ParkEvent.from_vehicle(level_id, spot_num, vehicle, ticket_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()  # connection is reused, never leave a transaction open
+        raise
 
-        # Delete vehicle
-        cursor.execute("DELETE FROM parked_vehicles WHERE spot_id = ?", (spot_id,))
+def save_unpark_to_db(ticket_id: str, db_file: Optional[str] = None):
+    """Remove parking data from database on unpark."""
+    conn = get_connection(db_file)
+    try:
+        _write_unpark(conn.cursor(), UnparkEvent(ticket_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()  # connection is reused, never leave a transaction open
+        raise
 
-        # Delete ticket
-        cursor.execute("DELETE FROM active_tickets WHERE ticket_id = ?", (ticket_id,))
+def save_events_to_db(events: List[ParkingEvent], db_file: Optional[str] = None):
+    """
+    Apply a batch of park/unpark events in order, in ONE transaction (group commit).
+    Used by the write-behind writer; either the whole batch is committed or none of it.
+    """
+    conn = get_connection(db_file)
+    cursor = conn.cursor()
+    try:
+        for event in events:
+            if isinstance(event, ParkEvent):
+                _write_park(cursor, event)
+            else:
+                _write_unpark(cursor, event)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
+def iter_completed_sessions(start: datetime, end: datetime, license_plate: Optional[str] = None,
+                            db_file: Optional[str] = None) -> Iterator[CompletedSession]:
+    """
+    Stream archived sessions that overlap [start, end) (exited after start, entered before end),
+    in exit order. Rows are read one at a time through the exit_time (or plate) index.
+    """
+    cursor = get_connection(db_file).cursor()
+    cursor.row_factory = None
+    sql = """
+        SELECT ticket_id, license_plate, vehicle_type, level_id, spot_number, entry_time, exit_time, fee
+        FROM completed_sessions
+        WHERE exit_time > ? AND entry_time < ?
+    """
+    params = [start.isoformat(), end.isoformat()]
+    if license_plate is not None:
+        sql += " AND license_plate = ?"
+        params.append(license_plate)
+    cursor.execute(sql + " ORDER BY exit_time", params)
+    for row in cursor:
+        yield CompletedSession(*row)
+
+def load_reservations(db_file: Optional[str] = None) -> List[Reservation]:
+    """All stored reservations, earliest start first."""
+    cursor = get_connection(db_file).cursor()
+    cursor.row_factory = None
+    cursor.execute("""
+        SELECT reservation_id, license_plate, level_id, spot_type, start_time, end_time
+        FROM reservations ORDER BY start_time
+    """)
+    return [Reservation(reservation_id, plate, level_id, SpotType[spot_type],
+                        datetime.fromisoformat(start), datetime.fromisoformat(end))
+            for reservation_id, plate, level_id, spot_type, start, end in cursor]
+
+def save_reservation(reservation: Reservation, db_file: Optional[str] = None):
+    conn = get_connection(db_file)
+    try:
+        conn.execute("""
+            INSERT INTO reservations (reservation_id, license_plate, level_id, spot_type, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (reservation.reservation_id, reservation.license_plate, reservation.level_id,
+              reservation.spot_type.name, reservation.start.isoformat(), reservation.end.isoformat()))
         conn.commit()
-        print(f"[DEBUG] Successfully unparked ticket {ticket_id} - removed from DB")
+    except Exception:
+        conn.rollback()
+        raise
 
-    except Exception as e:
+def delete_reservations(reservation_ids: List[str], db_file: Optional[str] = None):
+    """Delete reservations (checked in, cancelled or expired) in one transaction."""
+    conn = get_connection(db_file)
+    try:
+        conn.executemany("DELETE FROM reservations WHERE reservation_id = ?", ((r,) for r in reservation_ids))
+        conn.commit()
+    except Exception:
         conn.rollback()
-        print(f"[DEBUG] Unpark failed for ticket {ticket_id}: {str(e)}")
         raise
-    finally:
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,300 @@
+# Append-only event log + snapshot storage engine (alternative to the SQLite backend in db.py)
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .spot_store import SpotStore, to_epoch_us
+from .level import Level
+from .models import TicketEntry
+from .enums import VehicleType, SpotType
+from .events import ParkEvent, UnparkEvent, ParkingEvent, CompletedSession
+from .storage import StorageBackend
+
+SNAPSHOT_FILE = 'snapshot.json'
+LOG_FILE = 'events.jsonl'
+PREVIOUS_LOG_FILE = 'events.jsonl.1'  # log segment rotated out while its snapshot is written
+SESSIONS_DIR = 'sessions'  # completed-session archive: one <exit date>.jsonl file per day
+SNAPSHOT_EVERY = 10000  # events appended between two snapshots
+
+# One character per spot in the snapshot layout: 'M', 'C', 'L'
+_TYPE_CODES = {t.name[0]: t for t in SpotType}
+
+
+class EventLogStorage(StorageBackend):
+    """
+    Every park/unpark is appended as one JSON line to events.jsonl (sequential writes only).
+    Every snapshot_every events the log is rotated to events.jsonl.1 and the occupancy at
+    that point is written to snapshot.json by a background thread, so writers only wait for
+    a copy of the mirror, never for its encoding or fsync; the old segment is deleted once
+    the snapshot is in place. Startup loads the snapshot and replays both log segments.
+
+    Log lines carry a sequence number and the snapshot records the last one it contains,
+    so a crash between writing a snapshot and truncating the log replays nothing twice.
+    A torn last line (crash mid-append) is ignored on replay.
+    Every unpark also appends the finished session to sessions/<exit date>.jsonl,
+    flushed together with the log; the archive is never compacted.
+    fsync=True makes every append durable against power loss, not just process crashes.
+    """
+
+    def __init__(self, directory: str = 'parking_data', snapshot_every: int = SNAPSHOT_EVERY,
+                 fsync: bool = False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._previous_log_path = os.path.join(directory, PREVIOUS_LOG_FILE)
+        self._sessions_dir = os.path.join(directory, SESSIONS_DIR)
+        self._archive = None       # open file of the current exit date
+        self._archive_date = None
+        self._lock = threading.Lock()
+        self._layout: List[Tuple[int, str]] = []  # (level_id, spot type codes in spot-number order)
+        self._parked: Dict[str, ParkEvent] = {}    # ticket_id -> park event, mirrored for snapshots
+        self._seq = 0
+        self._since_snapshot = 0
+        self._log = None
+        self._snapshotter: Optional[threading.Thread] = None  # background snapshot in progress
+        os.makedirs(self._sessions_dir, exist_ok=True)
+
+    # ---- startup -------------------------------------------------------
+
+    def load(self, num_levels, spots_per_level):
+        snapshot_seq = self._read_snapshot()
+        if snapshot_seq is None:
+            # First start: default layout, persisted straight away
+            for i in range(num_levels):
+                level = Level(i + 1, spots_per_level)
+                self._layout.append((level.level_id, ''.join(s.spot_type.name[0] for s in level.spots)))
+            self._write_snapshot()
+            print(f"Initialized event log with {num_levels} levels and {spots_per_level} spots per level.")
+        else:
+            replayed = self._replay_log(snapshot_seq)
+            if replayed:
+                self._write_snapshot()  # compact so the next start has nothing to replay
+
+        self._log = open(self._log_path, 'a', encoding='utf-8')
+        # Spots are numbered 1..n in layout order, so the index is number - 1; no row ids here
+        return self._build_levels(), {t: TicketEntry(e.level_id, e.spot_num, e.spot_num - 1)
+                                      for t, e in self._parked.items()}
+
+    def _read_snapshot(self) -> Optional[int]:
+        if not os.path.exists(self._snapshot_path):
+            return None
+        with open(self._snapshot_path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self._layout = [(level['id'], level['types']) for level in snapshot['levels']]
+        for record in snapshot['parked']:
+            event = ParkEvent(*record)
+            self._parked[event.ticket_id] = event
+        self._seq = snapshot['seq']
+        return self._seq
+
+    def _replay_log(self, after_seq: int) -> int:
+        """Apply log records newer than after_seq (rotated segment first) to the in-memory mirror; returns how many."""
+        replayed = 0
+        for path in (self._previous_log_path, self._log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the tail
+                    if record['seq'] <= after_seq:
+                        continue
+                    if record['op'] == 'park':
+                        event = ParkEvent(*record['e'])
+                        self._parked[event.ticket_id] = event
+                    else:
+                        self._parked.pop(record['ticket_id'], None)
+                    self._seq = record['seq']
+                    replayed += 1
+        return replayed
+
+    def _build_levels(self) -> List[Level]:
+        stores: Dict[int, SpotStore] = {}
+        for level_id, codes in self._layout:
+            store = stores[level_id] = SpotStore(level_id)
+            for number, code in enumerate(codes, start=1):
+                store.append(number, _TYPE_CODES[code])
+        for event in self._parked.values():
+            store = stores[event.level_id]
+            i = event.spot_num - 1
+            store.occupied[i] = 1
+            store.set_vehicle(i, event.license_plate, VehicleType[event.vehicle_type],
+                              to_epoch_us(datetime.fromisoformat(event.entry_time)))
+        return [Level(level_id, len(store), store=store) for level_id, store in stores.items()]
+
+    # ---- writes ----------------------------------------------------------
+
+    def _append(self, event: ParkingEvent):
+        """Write one log line and update the mirror. Caller holds self._lock."""
+        self._seq += 1
+        if isinstance(event, ParkEvent):
+            record = {'seq': self._seq, 'op': 'park', 'e': list(event)}
+            self._parked[event.ticket_id] = event
+        else:
+            record = {'seq': self._seq, 'op': 'unpark', 'ticket_id': event.ticket_id}
+            parked = self._parked.pop(event.ticket_id, None)
+            if parked is not None:
+                self._archive_session(parked, event)
+        self._log.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._since_snapshot += 1
+
+    def _archive_session(self, parked: ParkEvent, event: UnparkEvent):
+        """Append the finished session to its exit date's archive file. Caller holds self._lock."""
+        exit_time = event.exit_time or datetime.now().isoformat()
+        exit_date = exit_time[:10]
+        if exit_date != self._archive_date:
+            if self._archive is not None:
+                self._archive.close()
+            self._archive = open(os.path.join(self._sessions_dir, f"{exit_date}.jsonl"), 'a', encoding='utf-8')
+            self._archive_date = exit_date
+        session = CompletedSession(event.ticket_id, parked.license_plate, parked.vehicle_type, parked.level_id,
+                                   parked.spot_num, parked.entry_time, exit_time, event.fee)
+        self._archive.write(json.dumps(list(session), separators=(',', ':')) + '\n')
+
+    def _sync(self):
+        with self.instrumentation.timer('commit'):
+            if self._archive is not None:
+                self._archive.flush()
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+        if self._since_snapshot >= self.snapshot_every and self._snapshotter is None:
+            self._start_snapshot()
+
+    def save_park(self, event):
+        with self._lock:
+            self._append(event)
+            self._sync()
+
+    def save_unpark(self, event):
+        with self._lock:
+            self._append(event)
+            self._sync()
+
+    def save_events(self, events):
+        with self._lock:
+            for event in events:
+                self._append(event)
+            self._sync()  # one flush/fsync for the whole batch
+
+    # ---- snapshots ---------------------------------------------------------
+
+    def _snapshot_state(self) -> dict:
+        """The mirror at self._seq; ParkEvents are tuples, so json encodes them as the log's lists."""
+        return {
+            'seq': self._seq,
+            'levels': [{'id': level_id, 'types': codes} for level_id, codes in self._layout],
+            'parked': list(self._parked.values()),
+        }
+
+    def _store_snapshot(self, snapshot: dict):
+        tmp_path = self._snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+
+    def _start_snapshot(self):
+        """Rotate the log and snapshot the mirror on a background thread. Caller holds self._lock."""
+        if os.path.exists(self._previous_log_path):
+            self._write_snapshot()  # the last background snapshot failed: don't overwrite its segment
+            return
+        snapshot = self._snapshot_state()
+        self._log.close()
+        os.replace(self._log_path, self._previous_log_path)
+        self._log = open(self._log_path, 'a', encoding='utf-8')
+        self._since_snapshot = 0
+        self._snapshotter = threading.Thread(target=self._finish_snapshot, args=(snapshot,),
+                                             name='event-log-snapshot', daemon=True)
+        self._snapshotter.start()
+
+    def _finish_snapshot(self, snapshot: dict):
+        try:
+            self._store_snapshot(snapshot)
+            os.remove(self._previous_log_path)  # every record in it is in the snapshot now
+        finally:
+            with self._lock:
+                self._snapshotter = None
+
+    def _acquire_idle(self):
+        """Take self._lock once no background snapshot is running; the caller releases it."""
+        while True:
+            self._lock.acquire()
+            snapshotter = self._snapshotter
+            if snapshotter is None:
+                return
+            self._lock.release()
+            snapshotter.join()
+
+    def _write_snapshot(self):
+        """
+        Atomically replace the snapshot, then truncate the log (and drop a rotated segment).
+        Caller holds self._lock with no background snapshot running (or is loading).
+        """
+        self._store_snapshot(self._snapshot_state())
+        if self._log is not None:
+            self._log.close()
+        open(self._log_path, 'w').close()  # everything up to self._seq is in the snapshot
+        if os.path.exists(self._previous_log_path):
+            os.remove(self._previous_log_path)
+        if self._log is not None:
+            self._log = open(self._log_path, 'a', encoding='utf-8')
+        self._since_snapshot = 0
+
+    def snapshot(self):
+        """Force a snapshot + log compaction now."""
+        self._acquire_idle()
+        try:
+            self._write_snapshot()
+        finally:
+            self._lock.release()
+
+    # ---- session archive ---------------------------------------------------
+
+    def iter_sessions(self, start, end, license_plate=None):
+        """Stream archived sessions overlapping [start, end), reading one line at a time."""
+        with self._lock:
+            if self._archive is not None:
+                self._archive.flush()
+        start_iso, end_iso = start.isoformat(), end.isoformat()
+        first_file = f"{start_iso[:10]}.jsonl"  # sessions that exited before start's day can't overlap
+        for name in sorted(os.listdir(self._sessions_dir)):
+            if not name.endswith('.jsonl') or name < first_file:
+                continue
+            with open(os.path.join(self._sessions_dir, name), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        session = CompletedSession(*json.loads(line))
+                    except ValueError:
+                        break  # torn write at the tail
+                    if session.exit_time > start_iso and session.entry_time < end_iso and (
+                            license_plate is None or session.license_plate == license_plate):
+                        yield session
+
+    def flush(self):
+        with self._lock:
+            if self._archive is not None:
+                self._archive.flush()
+            if self._log is not None:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+
+    def close(self):
+        self._acquire_idle()
+        try:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+            if self._log is not None:
+                self._write_snapshot()
+                self._log.close()
+                self._log = None
+        finally:
+            self._lock.release()
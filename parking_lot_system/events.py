@@ -0,0 +1,42 @@
+# Persistence events emitted by ParkingLot for park/unpark operations
+from typing import NamedTuple, Optional, Union
+
+from .models import Vehicle
+
+
+class ParkEvent(NamedTuple):
+    level_id: int
+    spot_num: int
+    license_plate: str
+    vehicle_type: str  # VehicleType.name, e.g. 'CAR'
+    entry_time: str    # ISO format
+    ticket_id: str
+    spot_id: Optional[int] = None  # storage row id of the spot if known (saves a lookup query)
+
+    @classmethod
+    def from_vehicle(cls, level_id: int, spot_num: int, vehicle: Vehicle, ticket_id: str,
+                     spot_id: Optional[int] = None) -> "ParkEvent":
+        return cls(level_id, spot_num, vehicle.license_plate, vehicle.vehicle_type.name,
+                   vehicle.entry_time.isoformat(), ticket_id, spot_id)
+
+
+class UnparkEvent(NamedTuple):
+    ticket_id: str
+    spot_id: Optional[int] = None    # as in ParkEvent
+    exit_time: Optional[str] = None  # ISO format; None = when storage applies it
+    fee: Optional[float] = None      # fee charged, recorded in the session archive
+
+
+class CompletedSession(NamedTuple):
+    """One finished stay, as kept in the session archive."""
+    ticket_id: str
+    license_plate: str
+    vehicle_type: str  # VehicleType.name
+    level_id: int
+    spot_number: int
+    entry_time: str    # ISO format
+    exit_time: str     # ISO format
+    fee: Optional[float]
+
+
+ParkingEvent = Union[ParkEvent, UnparkEvent]
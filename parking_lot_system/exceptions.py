@@ -15,4 +15,10 @@ class SpotNotFoundException(ParkingException):
     pass
 
 class VehicleAlreadyParkedException(ParkingException):
-    pass
\ No newline at end of file
+    pass
+
+class FacilityNotFoundException(ParkingException):
+    pass
+
+class ReservationException(ParkingException):
+    pass
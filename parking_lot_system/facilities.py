@@ -0,0 +1,182 @@
+# Many garages in one process: lazily loaded ParkingLots keyed by facility id, evicted when idle
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+from .exceptions import FacilityNotFoundException
+from .instrumentation import Instrumentation
+from .parking_lot import ParkingLot
+from .storage import SQLiteStorage
+from .config import FACILITIES, FACILITY_DATA_DIR, FACILITY_IDLE_SECONDS, FACILITY_MAX_LOADED
+
+
+class FacilityConfig(NamedTuple):
+    """Layout of one garage."""
+    num_levels: int
+    spots_per_level: int
+    write_behind: Optional[bool] = None  # None = config.WRITE_BEHIND
+
+
+class _Loaded:
+    """A facility's ParkingLot plus how many requests are using it and when it was last used."""
+    __slots__ = ('lot', 'in_use', 'last_used')
+
+    def __init__(self, now: float):
+        self.lot: Optional[ParkingLot] = None  # None until the first lease has loaded it
+        self.in_use = 0
+        self.last_used = now
+
+
+class FacilityRegistry:
+    """
+    Hosts many ParkingLots in one process, keyed by facility id.
+
+    A lot is loaded from its own SQLite file ({data_dir}/{facility_id}.db) on the
+    first lease() and stays in memory while it is used. After each lease the
+    registry closes lots idle for more than idle_seconds, and the least recently
+    used ones beyond max_loaded; a lot that is leased is never evicted. Evicted
+    lots are flushed, so reloading one later sees every committed park/unpark.
+    Loading and closing the same facility are serialized by a per-facility lock;
+    different facilities load in parallel. adopt() hosts a lot opened elsewhere
+    (e.g. an app's default lot) under an id; it is never evicted.
+    """
+
+    def __init__(self, facilities: Optional[Mapping[str, FacilityConfig]] = None,
+                 data_dir: str = FACILITY_DATA_DIR,
+                 idle_seconds: Optional[float] = FACILITY_IDLE_SECONDS,
+                 max_loaded: Optional[int] = FACILITY_MAX_LOADED,
+                 instrumentation_factory: Optional[Callable[[], Instrumentation]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if facilities is None:
+            facilities = {fid: FacilityConfig(**layout) for fid, layout in FACILITIES.items()}
+        self.facilities: Dict[str, FacilityConfig] = dict(facilities)
+        self.data_dir = data_dir
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self.instrumentation_factory = instrumentation_factory
+        self._clock = clock
+        self._loaded: "OrderedDict[str, _Loaded]" = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+        self._facility_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, facility_id: str, config: FacilityConfig):
+        """Add or replace a facility layout (a loaded lot keeps its layout until evicted)."""
+        with self._lock:
+            self.facilities[facility_id] = config
+
+    def adopt(self, facility_id: str, lot: ParkingLot):
+        """
+        Serve an already-open lot as facility_id instead of loading {data_dir}/{facility_id}.db,
+        so one garage is never open twice under the same id. The lot stays loaded
+        (never evicted) and is closed by close().
+        """
+        spots_per_level = lot.levels[0].total_spots if lot.levels else 0
+        with self._lock:
+            entry = self._loaded.get(facility_id)
+            if entry is not None and entry.lot is not lot:
+                raise ValueError(f"Facility {facility_id} is already loaded")
+            self.facilities[facility_id] = FacilityConfig(len(lot.levels), spots_per_level)
+            if entry is None:
+                entry = self._loaded[facility_id] = _Loaded(self._clock())
+                entry.lot = lot
+                entry.in_use = 1  # a permanent lease: evict() skips leased lots
+            self._facility_locks.setdefault(facility_id, threading.Lock())
+
+    def db_file(self, facility_id: str) -> str:
+        return os.path.join(self.data_dir, f"{facility_id}.db")
+
+    @contextmanager
+    def lease(self, facility_id: str) -> Iterator[ParkingLot]:
+        """
+        Use a facility's lot for the duration of the block (loading it if needed).
+        Raises FacilityNotFoundException for an unknown facility id.
+        """
+        entry = self._acquire(facility_id)
+        try:
+            yield entry.lot
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = self._clock()
+            self.evict()
+
+    def _acquire(self, facility_id: str) -> _Loaded:
+        with self._lock:
+            config = self.facilities.get(facility_id)
+            if config is None:
+                raise FacilityNotFoundException(f"Unknown facility: {facility_id}")
+            entry = self._loaded.get(facility_id)
+            if entry is None:
+                entry = self._loaded[facility_id] = _Loaded(self._clock())
+            self._loaded.move_to_end(facility_id)
+            entry.in_use += 1
+            facility_lock = self._facility_locks.setdefault(facility_id, threading.Lock())
+
+        if entry.lot is None:
+            try:
+                with facility_lock:  # waits for an eviction of this facility that is still closing
+                    if entry.lot is None:
+                        entry.lot = self._build(facility_id, config)
+            except BaseException:
+                with self._lock:
+                    entry.in_use -= 1
+                    if entry.lot is None and self._loaded.get(facility_id) is entry:
+                        del self._loaded[facility_id]
+                raise
+        return entry
+
+    def _build(self, facility_id: str, config: FacilityConfig) -> ParkingLot:
+        os.makedirs(self.data_dir, exist_ok=True)
+        instrumentation = self.instrumentation_factory() if self.instrumentation_factory else None
+        return ParkingLot(config.num_levels, config.spots_per_level,
+                          storage=SQLiteStorage(self.db_file(facility_id), write_behind=config.write_behind),
+                          instrumentation=instrumentation)
+
+    def evict(self, now: Optional[float] = None) -> List[str]:
+        """
+        Close lots idle for more than idle_seconds, then the least recently used ones
+        above max_loaded. Leased lots are skipped. Returns the evicted facility ids.
+        """
+        now = self._clock() if now is None else now
+        victims = []
+        with self._lock:
+            idle = [fid for fid, entry in self._loaded.items()
+                    if entry.in_use == 0 and entry.lot is not None
+                    and self.idle_seconds is not None and now - entry.last_used > self.idle_seconds]
+            excess = 0 if self.max_loaded is None else len(self._loaded) - len(idle) - self.max_loaded
+            for fid, entry in self._loaded.items():  # LRU order
+                if excess <= 0:
+                    break
+                if fid not in idle and entry.in_use == 0 and entry.lot is not None:
+                    idle.append(fid)
+                    excess -= 1
+            for fid in idle:
+                entry = self._loaded.pop(fid)
+                facility_lock = self._facility_locks[fid]
+                facility_lock.acquire()  # held until closed, so a reload waits for the flush
+                victims.append((fid, entry.lot, facility_lock))
+
+        for fid, lot, facility_lock in victims:
+            try:
+                lot.close()
+            finally:
+                facility_lock.release()
+        return [fid for fid, _, _ in victims]
+
+    def loaded(self) -> List[str]:
+        """Ids of the facilities currently in memory, least recently used first."""
+        with self._lock:
+            return [fid for fid, entry in self._loaded.items() if entry.lot is not None]
+
+    def close(self):
+        """Close every loaded lot (flushes pending writes). Call on shutdown."""
+        with self._lock:
+            entries = list(self._loaded.items())
+            self._loaded.clear()
+        for fid, entry in entries:
+            if entry.lot is not None:
+                with self._facility_locks[fid]:
+                    entry.lot.close()
@@ -0,0 +1,159 @@
+# Pluggable instrumentation: structured log events and timing histograms for the park/unpark path
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+# Upper bounds (seconds) of the timing histogram buckets; a final +Inf bucket is implied
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds (count per bucket, total count and sum)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (0 < q <= 1); None if empty."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return None
+        rank, seen = q * total, 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('_instrumentation', '_name', '_start')
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._instrumentation.observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Instrumentation:
+    """
+    Hook called by ParkingLot and the storage backends.
+    This base class is the "off" switch: every method is a no-op and timer()
+    returns a shared do-nothing context manager, so an uninstrumented lot
+    pays one method call per hook.
+    Timing names used by the lot:
+        park / unpark                    whole successful park_vehicle / unpark_vehicle call
+        allocate                         find + occupy a spot (find_suitable_spot's job)
+        persist_park / persist_unpark    storage call on the request thread
+        commit                           the durable write itself (on the writer thread in write-behind mode)
+    Counter names: park_rejected_full, park_rejected_already_parked, unpark_rejected_invalid_ticket,
+    write_behind_failed (events the write-behind writer could not persist).
+    """
+    enabled = False
+
+    def event(self, level: int, name: str, **fields):
+        """Structured log event, e.g. event(logging.DEBUG, 'unpark', ticket_id=..., fee=...)."""
+        pass
+
+    def observe(self, name: str, seconds: float):
+        """Record one duration in the histogram called name."""
+        pass
+
+    def timer(self, name: str):
+        """Context manager that observes the duration of its block."""
+        return _NULL_TIMER
+
+    def count(self, name: str, amount: int = 1):
+        """Increment the counter called name."""
+        pass
+
+    def histograms(self) -> Dict[str, Histogram]:
+        return {}
+
+    def counters(self) -> Dict[str, int]:
+        return {}
+
+
+NULL_INSTRUMENTATION = Instrumentation()
+
+
+class LoggingInstrumentation(Instrumentation):
+    """
+    Sends events at or above `level` to a stdlib logger (message 'name key=value ...',
+    fields also attached as record.event / record.fields for structured handlers)
+    and keeps a timing Histogram and a counter per name.
+    """
+    enabled = True
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.logger = logger or logging.getLogger('parking_lot_system')
+        self.level = level
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def event(self, level, name, **fields):
+        if level < self.level or not self.logger.isEnabledFor(level):
+            return
+        message = ' '.join([name] + [f"{key}={value}" for key, value in fields.items()])
+        self.logger.log(level, message, extra={'event': name, 'fields': fields})
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name, seconds):
+        self._histogram(name).observe(seconds)
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def histograms(self):
+        return dict(self._histograms)
+
+    def counters(self):
+        return dict(self._counters)
@@ -1,42 +1,183 @@
 # Level class
+import heapq
+import threading
 from typing import Optional, Dict
 
-from .models import ParkingSpot, Vehicle
+from .models import ParkingSpot, SpotViews, Vehicle
+from .spot_store import SpotStore, SPOT_TYPES
+from .snapshot import LevelSnapshot
 from .enums import SpotType
 from .config import SPOT_DISTRIBUTION
 
 class Level:
-    def __init__(self, level_id: int, capacity: int):
+    def __init__(self, level_id: int, capacity: int, spots: Optional[list[ParkingSpot]] = None,
+                 store: Optional[SpotStore] = None, distribution: Optional[Dict[str, float]] = None):
+        """
+        Spot state lives in a columnar SpotStore; self.spots hands out views over it on access.
+        store: a ready SpotStore (e.g. filled by a storage loader).
+        spots: existing ParkingSpot objects, copied into a new store.
+        The default layout is built when neither is given, split by distribution
+        ({'MOTORCYCLE': share, 'COMPACT': share}, the rest LARGE; defaults to SPOT_DISTRIBUTION).
+        """
         self.level_id = level_id
-        self.spots: list[ParkingSpot] = []
-        self._initialize_spots(capacity)
+        self.lock = threading.Lock()  # guards spot state and the free index; held by ParkingLot while reserving
+        if store is None:
+            store = SpotStore(level_id)
+            if spots is None:
+                self._initialize_spots(store, capacity, distribution or SPOT_DISTRIBUTION)
+            else:
+                for spot in spots:
+                    i = store.append(spot.number, spot.spot_type)
+                    store.occupied[i] = 1 if spot.is_occupied else 0
+                    if spot.vehicle is not None:
+                        ParkingSpot.view(store, i).vehicle = spot.vehicle
+        self.version = 0
+        self.hydrate(store)
 
-    def _initialize_spots(self, capacity: int):
+    @classmethod
+    def from_counts(cls, level_id: int, free: Dict[SpotType, int], occupied: Dict[SpotType, int]) -> "Level":
+        """
+        A level known only by its per-SpotType counters (lazy loading): counts, snapshots
+        and free_count() work, spot access needs hydrate() first. Missing types count 0.
+        """
+        level = cls.__new__(cls)
+        level.level_id = level_id
+        level.lock = threading.Lock()
+        level.version = 0
+        level.store = None
+        level.spots = []
+        level._free_index = None
+        level._free_count = {t: free.get(t, 0) for t in SPOT_TYPES}
+        level._occupied_count = {t: occupied.get(t, 0) for t in SPOT_TYPES}
+        level._occupied_total = sum(level._occupied_count.values())
+        level.total_spots = level._occupied_total + sum(level._free_count.values())
+        level._publish()
+        return level
+
+    @property
+    def hydrated(self) -> bool:
+        return self.store is not None
+
+    def hydrate(self, store: SpotStore):
+        """Attach the level's spot state (replacing any counters-only state) and index it."""
+        self.store = store
+        self.spots = SpotViews(store)
+        self.total_spots = len(store)
+        self.rebuild_free_index()
+
+    def _initialize_spots(self, store: SpotStore, capacity: int, distribution: Dict[str, float]):
         # Use config for distribution
-        motorcycle_count = int(capacity * SPOT_DISTRIBUTION['MOTORCYCLE'])  #bike spots are allocated based on the spot distribution(we can control it in config.py)
-        compact_count = int(capacity * SPOT_DISTRIBUTION['COMPACT'])    #car spots are allocated based on the spot distribution(we can control it in config.py)
+        motorcycle_count = int(capacity * distribution['MOTORCYCLE'])  #bike spots are allocated based on the spot distribution(we can control it in config.py)
+        compact_count = int(capacity * distribution['COMPACT'])    #car spots are allocated based on the spot distribution(we can control it in config.py)
         large_count = capacity - motorcycle_count - compact_count
 
-        spot_id = 1
-        for _ in range(motorcycle_count):
-            self.spots.append(ParkingSpot(spot_id, self.level_id, SpotType.MOTORCYCLE))
-            spot_id += 1
-        for _ in range(compact_count):
-            self.spots.append(ParkingSpot(spot_id, self.level_id, SpotType.COMPACT))
-            spot_id += 1
-        for _ in range(large_count):
-            self.spots.append(ParkingSpot(spot_id, self.level_id, SpotType.LARGE))
-            spot_id += 1
+        store.extend(SpotType.MOTORCYCLE, 1, motorcycle_count)
+        store.extend(SpotType.COMPACT, 1 + motorcycle_count, compact_count)
+        store.extend(SpotType.LARGE, 1 + motorcycle_count + compact_count, large_count)
+
+    def rebuild_free_index(self):
+        """
+        Rebuild the per-SpotType free-spot index and occupancy counters from the store.
+        Each SpotType keeps a min-heap of spot positions, so the
+        lowest-numbered free spot of a type is always on top.
+        The store gets this level as its observer, so ParkingSpot.park/unpark
+        keep the index and counters up to date in O(1) / O(log n).
+        Must be called whenever spot occupancy is changed behind the spots' back
+        (e.g. while loading from storage).
+        """
+        store = self.store
+        store.observer = self
+        free_index = [[] for _ in SPOT_TYPES]
+        occupied_codes = [0] * len(SPOT_TYPES)
+        occupied = store.occupied
+        for pos, code in enumerate(store.types):
+            if occupied[pos]:
+                occupied_codes[code] += 1
+            else:
+                free_index[code].append(pos)  # positions ascend, so each list is already a valid heap
+
+        self._free_index: Dict[SpotType, list[int]] = {t: free_index[c] for c, t in enumerate(SPOT_TYPES)}
+        self._free_count: Dict[SpotType, int] = {t: len(free_index[c]) for c, t in enumerate(SPOT_TYPES)}
+        self._occupied_count: Dict[SpotType, int] = {t: occupied_codes[c] for c, t in enumerate(SPOT_TYPES)}
+        self._occupied_total = sum(occupied_codes)
+        self._publish()
+
+    def _peek_free(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        """Return the lowest-numbered free spot of spot_type, dropping stale heap entries."""
+        heap = self._free_index[spot_type]
+        occupied = self.store.occupied
+        while heap:
+            if not occupied[heap[0]]:
+                return ParkingSpot.view(self.store, heap[0])
+            heapq.heappop(heap)  # stale: spot was occupied without being the heap top
+        return None
+
+    def get_spot(self, number: int) -> Optional[ParkingSpot]:
+        """Spot by number: O(1) for the usual 1..n numbering, linear fallback otherwise."""
+        pos = number - 1
+        numbers = self.store.numbers
+        if 0 <= pos < len(numbers) and numbers[pos] == number:
+            return ParkingSpot.view(self.store, pos)
+        pos = next((i for i, n in enumerate(numbers) if n == number), None)
+        return None if pos is None else ParkingSpot.view(self.store, pos)
+
+    def find_spot_of_type(self, spot_type: SpotType) -> Optional[ParkingSpot]:
+        if self._free_count[spot_type] == 0:
+            return None
+        return self._peek_free(spot_type)
 
     def find_suitable_spot(self, vehicle: Vehicle) -> Optional[ParkingSpot]:
-        for spot in self.spots:
-            if not spot.is_occupied and vehicle.can_fit_in_spot(spot.spot_type):
-                return spot
+        # SpotType is declared smallest-first and spots are numbered in that order,
+        # so the first fitting type with a free spot gives the same spot as a linear scan
+        for spot_type in SpotType:
+            if vehicle.can_fit_in_spot(spot_type):
+                spot = self.find_spot_of_type(spot_type)
+                if spot:
+                    return spot
         return None
 
+    def occupy_spot(self, spot: ParkingSpot, vehicle: Vehicle, entry_time=None):
+        """Park vehicle in spot (index and counters follow via on_spot_parked). Caller holds self.lock."""
+        spot.park(vehicle, entry_time)
+
+    def release_spot(self, spot: ParkingSpot, fee_rate: float, billing=None, exit_time=None) -> float:
+        """Unpark the vehicle in spot and return the fee (index and counters follow). Caller holds self.lock."""
+        return spot.unpark(fee_rate, billing, exit_time)
+
+    def on_spot_parked(self, spot: ParkingSpot):
+        """Called by ParkingSpot.park: remove the spot from the free index, update counters."""
+        heap = self._free_index[spot.spot_type]
+        if heap and heap[0] == spot.index:
+            heapq.heappop(heap)
+        # Otherwise the entry is left in place and dropped lazily by _peek_free()
+        self._free_count[spot.spot_type] -= 1
+        self._occupied_count[spot.spot_type] += 1
+        self._occupied_total += 1
+        self._publish()
+
+    def on_spot_unparked(self, spot: ParkingSpot):
+        """Called by ParkingSpot.unpark: return the spot to the free index, update counters."""
+        heapq.heappush(self._free_index[spot.spot_type], spot.index)
+        self._free_count[spot.spot_type] += 1
+        self._occupied_count[spot.spot_type] -= 1
+        self._occupied_total -= 1
+        self._publish()
+
+    def _publish(self):
+        """Replace self.snapshot with the current counters (readers never lock the level)."""
+        self.version += 1
+        self.snapshot = LevelSnapshot(self.level_id, self.version, self.total_spots,
+                                      tuple(map(self._free_count.__getitem__, SPOT_TYPES)),
+                                      self._occupied_total)
+
+    def free_count(self, spot_type: SpotType) -> int:
+        return self._free_count[spot_type]
+
+    def occupied_count(self) -> int:
+        return self._occupied_total
+
     def get_available_count_by_type(self) -> Dict[SpotType, int]:
-        counts = {t: 0 for t in SpotType}
-        for spot in self.spots:
-            if not spot.is_occupied:
-                counts[spot.spot_type] += 1
-        return counts
\ No newline at end of file
+        return dict(self._free_count)
+
+    def get_occupied_count_by_type(self) -> Dict[SpotType, int]:
+        return dict(self._occupied_count)
@@ -0,0 +1,187 @@
+# Prometheus-style metrics: per-thread histogram/counter shards + text exposition format
+import logging
+import threading
+import weakref
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from .instrumentation import DEFAULT_BUCKETS, Histogram, LoggingInstrumentation
+
+if TYPE_CHECKING:
+    from .parking_lot import ParkingLot
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Instrumentation timing name -> (Prometheus metric name, help text)
+HISTOGRAM_METRICS = {
+    'park': ('parking_park_vehicle_seconds', 'Latency of successful ParkingLot.park_vehicle calls'),
+    'unpark': ('parking_unpark_vehicle_seconds', 'Latency of successful ParkingLot.unpark_vehicle calls'),
+    'allocate': ('parking_find_suitable_spot_seconds', 'Time to select and reserve a spot for a vehicle'),
+    'persist_park': ('parking_save_park_seconds', 'Storage call for park events (save_park_to_db) on the request thread'),
+    'persist_unpark': ('parking_save_unpark_seconds', 'Storage call for unpark events (save_unpark_to_db) on the request thread'),
+    'commit': ('parking_storage_commit_seconds', 'Durable storage write (one transaction / log sync)'),
+}
+
+# Counter name -> (Prometheus metric name, labels, help text); names sharing a metric become one family
+COUNTER_METRICS = {
+    'park_rejected_full': ('parking_rejections_total', 'reason="full"', 'Rejected park/unpark requests'),
+    'park_rejected_already_parked': ('parking_rejections_total', 'reason="already_parked"',
+                                     'Rejected park/unpark requests'),
+    'unpark_rejected_invalid_ticket': ('parking_rejections_total', 'reason="invalid_ticket"',
+                                       'Rejected park/unpark requests'),
+    'write_behind_failed': ('parking_write_behind_failures_total', '',
+                            'Park/unpark events the write-behind writer failed to persist'),
+}
+
+
+class _Shard:
+    """One thread's histogram buckets and counters; only that thread writes to it."""
+    __slots__ = ('histograms', 'counters')
+
+    def __init__(self):
+        self.histograms: Dict[str, List[float]] = {}  # name -> bucket counts..., +Inf count, sum
+        self.counters: Dict[str, int] = {}
+
+    def add(self, other: "_Shard"):
+        for name, slots in list(other.histograms.items()):
+            mine = self.histograms.get(name)
+            if mine is None:
+                self.histograms[name] = list(slots)
+            else:
+                for i, n in enumerate(slots):
+                    mine[i] += n
+        for name, value in list(other.counters.items()):
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+class _ShardOwner:
+    """Lives only in the thread-local: collected when its thread ends, which retires the shard."""
+    __slots__ = ('__weakref__',)
+
+
+def _retire_shard(metrics_ref: "weakref.ref[MetricsInstrumentation]", shard: _Shard):
+    metrics = metrics_ref()
+    if metrics is not None:
+        metrics._retire(shard)
+
+
+class MetricsInstrumentation(LoggingInstrumentation):
+    """
+    Instrumentation that keeps timings and counters for a /metrics scrape.
+
+    Recording is lock-free: every thread writes to its own shard (created once
+    per thread under a lock) and scrapes sum the shards. A scrape may see an
+    observation in a bucket slightly before it shows in the sum, which
+    Prometheus tolerates; nothing is lost. When a thread ends its shard is
+    folded into a base total and dropped, so short-lived request threads don't
+    grow the shard list. Log events are forwarded like
+    LoggingInstrumentation (only WARNING and above by default).
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.WARNING,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(logger, level, buckets)
+        self._local = threading.local()
+        self._base = _Shard()  # totals of threads that have ended
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.RLock()  # RLock: a retiring finalizer may run (via GC) while this thread holds it
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            self._local.owner = owner = _ShardOwner()
+            weakref.finalize(owner, _retire_shard, weakref.ref(self), shard)
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _retire(self, shard: _Shard):
+        # Fold and drop under the same lock the scrapes merge under, so no scrape counts it twice or not at all
+        with self._shards_lock:
+            self._base.add(shard)
+            self._shards.remove(shard)
+
+    def _merged(self) -> _Shard:
+        merged = _Shard()
+        with self._shards_lock:
+            merged.add(self._base)
+            for shard in self._shards:
+                merged.add(shard)
+        return merged
+
+    def observe(self, name, seconds):
+        histograms = self._shard().histograms
+        slots = histograms.get(name)
+        if slots is None:
+            slots = histograms[name] = [0] * (len(self.buckets) + 1) + [0.0]
+        slots[bisect_left(self.buckets, seconds)] += 1
+        slots[-1] += seconds
+
+    def count(self, name, amount=1):
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """Merged view of every thread's shard (and of the threads that have ended)."""
+        merged: Dict[str, Histogram] = {}
+        for name, slots in self._merged().histograms.items():
+            histogram = merged[name] = Histogram(self.buckets)
+            histogram.counts = slots[:-1]
+            histogram.count = sum(histogram.counts)
+            histogram.sum = slots[-1]
+        return merged
+
+    def counters(self) -> Dict[str, int]:
+        return self._merged().counters
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def render_prometheus(lot: "ParkingLot") -> str:
+    """
+    Prometheus text exposition of the lot's instrumentation (histograms, rejection
+    counters) plus occupancy gauges per level and SpotType, read from the levels'
+    O(1) counters at scrape time.
+    """
+    lines: List[str] = []
+    instrumentation = lot.instrumentation
+
+    for name, histogram in sorted(instrumentation.histograms().items()):
+        metric, help_text = HISTOGRAM_METRICS.get(name, (f'parking_{name}_seconds', f'{name} duration'))
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        cumulative = 0
+        for bound, n in zip(histogram.buckets, histogram.counts):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{le="{_format_bound(bound)}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f'{metric}_sum {histogram.sum}')
+        lines.append(f'{metric}_count {cumulative}')
+
+    families: Dict[str, List[str]] = {}
+    helps: Dict[str, str] = {}
+    for name, value in sorted(instrumentation.counters().items()):
+        metric, labels, help_text = COUNTER_METRICS.get(name, (f'parking_{name}_total', '', f'{name} count'))
+        helps[metric] = help_text
+        families.setdefault(metric, []).append(f'{metric}{{{labels}}} {value}' if labels else f'{metric} {value}')
+    for metric, samples in families.items():
+        lines.append(f'# HELP {metric} {helps[metric]}')
+        lines.append(f'# TYPE {metric} counter')
+        lines.extend(samples)
+
+    free_lines, occupied_lines = [], []
+    for level in lot.levels:
+        occupied = level.get_occupied_count_by_type()
+        for spot_type, free in level.get_available_count_by_type().items():
+            labels = f'level="{level.level_id}",spot_type="{spot_type.name}"'
+            free_lines.append(f'parking_spots_free{{{labels}}} {free}')
+            occupied_lines.append(f'parking_spots_occupied{{{labels}}} {occupied.get(spot_type, 0)}')
+    lines += ['# HELP parking_spots_free Free spots per level and spot type',
+              '# TYPE parking_spots_free gauge', *free_lines,
+              '# HELP parking_spots_occupied Occupied spots per level and spot type',
+              '# TYPE parking_spots_occupied gauge', *occupied_lines]
+    return '\n'.join(lines) + '\n'
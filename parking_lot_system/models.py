@@ -1,10 +1,16 @@
 # Core data models: Vehicle subclasses, ParkingSpot, ParkingTicket (added for completeness)
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from datetime import datetime
+from typing import NamedTuple, Optional, TYPE_CHECKING
 import uuid
 
 from .enums import VehicleType, SpotType
 from .exceptions import InvalidSpotException
+from .spot_store import SpotStore, VEHICLE_TYPES, to_epoch_us, from_epoch_us
+
+if TYPE_CHECKING:
+    from .billing import BillingEngine
 
 class Vehicle(ABC):
     def __init__(self, license_plate: str, vtype: VehicleType):
@@ -37,37 +43,162 @@ class Bus(Vehicle):
     def can_fit_in_spot(self, spot_type: SpotType) -> bool:
         return spot_type == SpotType.LARGE
 
+def make_vehicle(vehicle_type: VehicleType, license_plate: str) -> Vehicle:
+    """Create the Vehicle subclass matching vehicle_type."""
+    if vehicle_type == VehicleType.MOTORCYCLE:
+        return Motorcycle(license_plate)
+    if vehicle_type == VehicleType.CAR:
+        return Car(license_plate)
+    if vehicle_type == VehicleType.BUS:
+        return Bus(license_plate)
+    raise ValueError(f"Unknown vehicle type: {vehicle_type}")
+
 class ParkingSpot:
-    def __init__(self, number: int, level: int, spot_type: SpotType):
-        self.number = number
-        self.level = level
-        self.spot_type = spot_type
-        self.is_occupied = False
-        self.vehicle = None
+    """
+    A parking spot, stored as a slotted view (store, index) over one row of a SpotStore.
+    ParkingSpot(number, level, spot_type) creates a spot backed by its own one-row store;
+    a Level keeps all its spots in one shared store and hands out views (ParkingSpot.view).
+    The vehicle is rebuilt from the plate / type / entry-time columns on access.
+    """
+    __slots__ = ('_store', '_index')
 
-    def park(self, vehicle: Vehicle) -> bool:
+    def __init__(self, number: int, level: int, spot_type: SpotType):
+        self._store = SpotStore(level)
+        self._index = self._store.append(number, spot_type)
+
+    @classmethod
+    def view(cls, store: SpotStore, index: int) -> "ParkingSpot":
+        spot = cls.__new__(cls)
+        spot._store = store
+        spot._index = index
+        return spot
+
+    @property
+    def index(self) -> int:
+        """Row of this spot in its SpotStore (== position in Level.spots)."""
+        return self._index
+
+    @property
+    def number(self) -> int:
+        return self._store.numbers[self._index]
+
+    @property
+    def level(self) -> int:
+        return self._store.level_id
+
+    @property
+    def spot_type(self) -> SpotType:
+        return self._store.spot_type(self._index)
+
+    @property
+    def is_occupied(self) -> bool:
+        return self._store.occupied[self._index] == 1
+
+    @is_occupied.setter
+    def is_occupied(self, value: bool):
+        self._store.occupied[self._index] = 1 if value else 0
+
+    @property
+    def vehicle(self) -> Optional[Vehicle]:
+        plate = self._store.plate(self._index)
+        if plate is None:
+            return None
+        vehicle = make_vehicle(VEHICLE_TYPES[self._store.vehicle_types[self._index]], plate)
+        entry_us = self._store.entry_us[self._index]
+        vehicle.entry_time = from_epoch_us(entry_us) if entry_us else None
+        return vehicle
+
+    @vehicle.setter
+    def vehicle(self, vehicle: Optional[Vehicle]):
+        if vehicle is None:
+            self._store.clear_vehicle(self._index)
+        else:
+            entry_us = to_epoch_us(vehicle.entry_time) if vehicle.entry_time else 0
+            self._store.set_vehicle(self._index, vehicle.license_plate, vehicle.vehicle_type, entry_us)
+
+    @property
+    def observer(self):
+        """Owning Level, notified on park/unpark to keep its counters in O(1)."""
+        return self._store.observer
+
+    @observer.setter
+    def observer(self, level):
+        self._store.observer = level
+
+    def park(self, vehicle: Vehicle, entry_time: Optional[datetime] = None) -> bool:
+        """Occupy the spot with vehicle, entering at entry_time (default: now)."""
         if self.is_occupied:
             raise InvalidSpotException("Spot is already occupied")
         if not vehicle.can_fit_in_spot(self.spot_type):
             raise InvalidSpotException("Vehicle cannot fit in this spot")
 
+        vehicle.entry_time = entry_time or datetime.now()
         self.vehicle = vehicle
         self.is_occupied = True
-        vehicle.entry_time = datetime.now()
+        if self._store.observer is not None:
+            self._store.observer.on_spot_parked(self)
         return True
 
-    def unpark(self, fee_rate: float) -> float:
+    def unpark(self, fee_rate: float, billing: Optional["BillingEngine"] = None,
+               exit_time: Optional[datetime] = None) -> float:
+        """
+        Free the spot and return the fee for a stay ending at exit_time (default: now):
+        billing.fee(...) if an engine is given, else hours * fee_rate.
+        """
         if not self.is_occupied:
             return 0.0
 
-        duration_hours = (datetime.now() - self.vehicle.entry_time).total_seconds() / 3600
-        fee = round(duration_hours * fee_rate, 2)
+        exit_time = exit_time or datetime.now()
+        entry_us = self._store.entry_us[self._index]
+        if billing is not None:
+            vehicle_type = VEHICLE_TYPES[self._store.vehicle_types[self._index]]
+            fee = billing.fee(vehicle_type, entry_us, to_epoch_us(exit_time))
+        else:
+            duration_hours = (exit_time - from_epoch_us(entry_us)).total_seconds() / 3600
+            fee = round(duration_hours * fee_rate, 2)
 
         self.vehicle = None
         self.is_occupied = False
+        if self._store.observer is not None:
+            self._store.observer.on_spot_unparked(self)
         return fee
 
+class SpotViews(Sequence):
+    """
+    Level.spots: ParkingSpot views over a SpotStore, created on access instead of kept
+    per spot (a view is stateless, so two views of one row behave the same).
+    """
+    __slots__ = ('_store',)
+
+    def __init__(self, store: SpotStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ParkingSpot.view(self._store, i) for i in range(*index.indices(len(self._store)))]
+        n = len(self._store)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('spot index out of range')
+        return ParkingSpot.view(self._store, index)
+
+    def __iter__(self):
+        store = self._store
+        for i in range(len(store)):
+            yield ParkingSpot.view(store, i)
+
 class ParkingTicket:
-    def __init__(self):
-        self.ticket_id = str(uuid.uuid4())
-        self.issue_time = datetime.now()
\ No newline at end of file
+    def __init__(self, ticket_id: Optional[str] = None, issue_time: Optional[datetime] = None):
+        self.ticket_id = ticket_id or str(uuid.uuid4())
+        self.issue_time = issue_time or datetime.now()
+
+class TicketEntry(NamedTuple):
+    """What ParkingLot.active_tickets keeps per ticket: enough to reach the spot without any search."""
+    level_id: int
+    spot_number: int
+    spot_index: int                # position in Level.spots / the level's SpotStore
+    spot_id: Optional[int] = None  # storage row id (SQLite spots.id), None if the backend has none
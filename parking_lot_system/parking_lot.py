@@ -1,116 +1,527 @@
 # Main ParkingLot class
-from typing import Dict, Tuple
+import logging
+import threading
+import time
+from contextlib import contextmanager, ExitStack
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from .db import save_park_to_db, save_unpark_to_db, get_connection
-from .models import Vehicle, ParkingSpot, ParkingTicket
+from .events import ParkEvent, UnparkEvent, CompletedSession
+from .storage import StorageBackend, SQLiteStorage
+from .models import Vehicle, ParkingSpot, ParkingTicket, TicketEntry
 from .level import Level
-from .enums import VehicleType
+from .enums import VehicleType, SpotType
+from .placement import CapacityIndex, PlacementPolicy, LowestLevelFirst
+from .billing import BillingEngine
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from .snapshot import AvailabilityFeed
+from .clock import Clock, SYSTEM_CLOCK, uuid_ids
+from .reservations import Reservation, ReservationBook
+from .spot_store import to_epoch_us
 from .exceptions import (
+    ParkingException,
     ParkingFullException,
     InvalidTicketException,
     SpotNotFoundException,
     InvalidSpotException,
-    VehicleAlreadyParkedException  # ← New exception we'll define/use
+    VehicleAlreadyParkedException,  # ← New exception we'll define/use
+    ReservationException
 )
-from .config import HOURLY_FEE_RATE
+from .config import HOURLY_FEE_RATE, WRITE_BEHIND, RESERVABLE_SHARE, LAZY_LOAD
 
 class ParkingLot:
-    def __init__(self, num_levels: int, spots_per_level: int):
+    def __init__(self, num_levels: int, spots_per_level: int,
+                 placement_policy: Optional[PlacementPolicy] = None,
+                 write_behind: Optional[bool] = None,
+                 storage: Optional[StorageBackend] = None,
+                 billing: Optional[BillingEngine] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 lazy: Optional[bool] = None,
+                 clock: Optional[Clock] = None,
+                 id_generator: Optional[Callable[[], str]] = None):
         """
-        Initialize the parking lot by loading from database (or creating if empty).
+        Initialize the parking lot by loading from storage (or creating if empty).
+        The lot is safe to share between threads: each Level has its own lock, so
+        gates parking on different levels don't serialize on a global lock.
+        placement_policy decides which level/spot type a vehicle goes to
+        (defaults to LowestLevelFirst, the original behaviour).
+        storage is the persistence backend (defaults to SQLiteStorage on db.DB_FILE;
+        see also EventLogStorage).
+        write_behind applies to the default SQLite backend only: park/unpark writes are
+        queued for a background group-committing writer instead of committing on the
+        caller's thread (defaults to config.WRITE_BEHIND).
+        billing computes fees (defaults to BillingEngine.from_config(), i.e. the flat HOURLY_FEE_RATE).
+        instrumentation receives log events, rejection counts and timings
+        (defaults to a no-op; see LoggingInstrumentation). It is shared with the storage backend.
+        lazy starts the lot from per-level counters only (if the backend supports it, see
+        StorageBackend.load_counts); spots, tickets and plates are loaded on the first
+        park/unpark/find, so status, availability and reservations are served without them
+        (defaults to config.LAZY_LOAD).
+        clock supplies entry/exit times (defaults to the wall clock; see clock.SimulatedClock)
+        and id_generator ticket and reservation ids (defaults to UUID4 strings), so runs
+        can be replayed faster than real time and reproducibly (see simulation.py).
+        Call flush() to wait for queued writes and close() on shutdown.
         """
-        self.levels: list[Level] = self._initialize_levels(num_levels, spots_per_level)
-        self.active_tickets: Dict[str, Tuple[int, int]] = self._load_active_tickets()
+        if storage is None:
+            if write_behind is None:
+                write_behind = WRITE_BEHIND
+            storage = SQLiteStorage(write_behind=write_behind)
+        self.storage: StorageBackend = storage
+        self.clock: Clock = clock or SYSTEM_CLOCK
+        self.new_id: Callable[[], str] = id_generator or uuid_ids
+        self.instrumentation: Instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.storage.instrumentation = self.instrumentation
 
-    def _initialize_levels(self, num_levels: int, spots_per_level: int) -> list[Level]:
-        """Delegate to db layer for initialization/loading."""
-        from .db import initialize_db
-        return initialize_db(num_levels, spots_per_level)
+        if lazy is None:
+            lazy = LAZY_LOAD
+        counts = self.storage.load_counts(num_levels, spots_per_level) if lazy else None
+        if counts is not None:
+            levels = [Level.from_counts(level_id, free, occupied) for level_id, free, occupied in counts]
+            tickets = {}
+        else:
+            levels, tickets = self.storage.load(num_levels, spots_per_level)
+        self.levels: list[Level] = levels
+        # ticket_id -> TicketEntry (level, spot index, storage row id): unpark needs no search or lookup query
+        self.active_tickets: Dict[str, TicketEntry] = tickets
+        self._hydrated = counts is None
+        self._hydrate_lock = threading.Lock()
+        self._layout = (num_levels, spots_per_level)
+        self.placement_policy: PlacementPolicy = placement_policy or LowestLevelFirst()
+        self.billing: BillingEngine = billing or BillingEngine.from_config()
+        self.capacity = CapacityIndex(self.levels)
+        self._level_pos: Dict[int, int] = {level.level_id: pos for pos, level in enumerate(self.levels)}
+        # Versioned availability snapshots for readers that must not contend with the gates
+        self.availability = AvailabilityFeed(self.levels)
+        # Reservations: time-bucketed holds per (level, SpotType), restored from storage
+        self.reservations = ReservationBook({
+            (level.level_id, spot_type): int(count * RESERVABLE_SHARE)
+            for level in self.levels
+            for spot_type, count in self._spots_by_type(level).items()
+        }, id_generator=self.new_id)
+        self.reservations.restore(self.storage.load_reservations())
+        self._holds_bucket: Optional[int] = None  # reservation bucket the capacity bits were last refreshed for
 
-    def _load_active_tickets(self) -> Dict[str, Tuple[int, int]]:
-        """Load active tickets from DB into memory."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        tickets: Dict[str, Tuple[int, int]] = {}
+        # Plate index: plate -> (level_id, spot_number, ticket_id) for every parked vehicle.
+        # Duplicate checks and find_vehicle() are answered here, never by storage
+        # (which may lag memory in write-behind mode). None marks a park still in progress.
+        self._plates_lock = threading.Lock()
+        self._plate_index: Dict[str, Optional[Tuple[int, int, str]]] = {}
+        self._index_plates()
 
-        cursor.execute("""
-            SELECT at.ticket_id, s.level_id, s.number
-            FROM active_tickets at
-            JOIN spots s ON at.spot_id = s.id
-        """)
-        for row in cursor.fetchall():
-            tickets[row['ticket_id']] = (row['level_id'], row['number'])
+    def _index_plates(self):
+        for ticket_id, entry in self.active_tickets.items():
+            plate = self.levels[self._level_pos[entry.level_id]].store.plate(entry.spot_index)
+            if plate is not None:
+                self._plate_index[plate] = (entry.level_id, entry.spot_number, ticket_id)
 
-        conn.close()
-        return tickets
+    @property
+    def hydrated(self) -> bool:
+        """False for a lazy lot until its spots and tickets have been loaded."""
+        return self._hydrated
+
+    def _ensure_hydrated(self):
+        """
+        Lazy lot: load spots, tickets and plates on first use. The loaded stores are
+        attached to the existing Level objects, so the capacity index, availability feed
+        and reservations keep working unchanged. No-op once loaded.
+        """
+        if self._hydrated:
+            return
+        with self._hydrate_lock:
+            if self._hydrated:
+                return
+            start = time.perf_counter()
+            levels, tickets = self.storage.load(*self._layout)
+            with self._all_levels_locked():
+                for loaded in levels:
+                    pos = self._level_pos.get(loaded.level_id)
+                    if pos is not None:
+                        self.levels[pos].hydrate(loaded.store)
+                self.active_tickets.update(tickets)
+                self._index_plates()
+                for level in self.levels:
+                    for spot_type in SpotType:
+                        self._update_capacity(level, spot_type)
+            self._hydrated = True
+            self.instrumentation.observe('hydrate', time.perf_counter() - start)
+
+    @staticmethod
+    def _spots_by_type(level: Level) -> Dict[SpotType, int]:
+        occupied = level.get_occupied_count_by_type()
+        return {t: free + occupied.get(t, 0) for t, free in level.get_available_count_by_type().items()}
 
     def park_vehicle(self, vehicle: Vehicle) -> str:
         """
         Park a vehicle if space is available and vehicle is not already parked.
         Returns ticket_id on success.
         """
-        # Step 1: Prevent duplicate parking of same license plate
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM parked_vehicles WHERE license_plate = ?",
-                       (vehicle.license_plate,))
-        if cursor.fetchone() is not None:
-            conn.close()
-            raise VehicleAlreadyParkedException(
-                f"Vehicle with license plate {vehicle.license_plate} is already parked!"
-            )
-        conn.close()
-
-        # Step 2: Find suitable spot
-        for level in self.levels:
-            spot: ParkingSpot | None = level.find_suitable_spot(vehicle)
-            if spot:
-                spot.park(vehicle)  # Updates spot.vehicle and is_occupied in memory
+        self._ensure_hydrated()
+        instrumentation = self.instrumentation
+        start = time.perf_counter()
+        # Step 1: Prevent duplicate parking of same license plate (reserve the plate atomically)
+        self._reserve_plate(vehicle.license_plate)
+
+        try:
+            now = self.clock.now()
+            self._refresh_holds(now)
+            # A vehicle with a reservation for now may use its held spot (and only it skips the hold)
+            booking = self.reservations.for_plate(vehicle.license_plate, now)
+            if booking is not None and vehicle.can_fit_in_spot(booking.spot_type):
+                level = self.levels[self._level_pos[booking.level_id]]
+                with level.lock:
+                    spot = self._free_spot(level, booking.spot_type, now, booking)
+                    if spot:
+                        ticket_id = self._park_in(level, spot, vehicle, start)
+                        self._check_in(booking)
+                        return ticket_id
+                # Held type full (walk-ins that outstayed RESERVATION_WALK_IN_MINUTES): place it like a walk-in
+
+            # Step 2: Let the placement policy pick a level with capacity (no per-level scan),
+            # then reserve a spot under that level's lock only
+            fit_types = [t for t in SpotType if vehicle.can_fit_in_spot(t)]
+            # Each miss clears the level's stale bits; give up after one pass over the levels
+            # rather than spinning if a bit keeps coming back (e.g. a concurrent exit)
+            for _ in range(len(self.levels)):
+                choice = self.placement_policy.select(self.levels, self.capacity, fit_types)
+                if choice is None:
+                    break
+                level, spot_type = choice
+
+                with level.lock:
+                    spot: ParkingSpot | None = self._free_spot(level, spot_type, now, booking) if spot_type else None
+                    if spot:
+                        ticket_id = self._park_in(level, spot, vehicle, start)
+                        if booking is not None:
+                            self._check_in(booking)
+                        return ticket_id
+                    # Another gate took the last spot between select() and the lock (or the rest is held
+                    # for reservations): refresh the stale bits (for the same `now`) and retry
+                    for fit_type in fit_types:
+                        self._update_capacity(level, fit_type, now)
+            instrumentation.count('park_rejected_full')
+            instrumentation.event(logging.INFO, 'park_rejected', license_plate=vehicle.license_plate,
+                                  reason='full')
+            raise ParkingFullException("No suitable spot available for this vehicle type")
+        except BaseException:
+            self._release_plate(vehicle.license_plate)
+            raise
+
+    def _park_in(self, level: Level, spot: ParkingSpot, vehicle: Vehicle, start: float) -> str:
+        """Occupy spot, persist the park and return the ticket id. Caller holds level.lock."""
+        instrumentation = self.instrumentation
+        event = self._occupy(level, spot, vehicle)
+        instrumentation.observe('allocate', time.perf_counter() - start)
+        # Persist (queued for the background writer in write-behind mode).
+        # Done under the level lock so events for the same spot reach storage in order.
+        with instrumentation.timer('persist_park'):
+            self.storage.save_park(event)
+        instrumentation.observe('park', time.perf_counter() - start)
+        instrumentation.event(logging.DEBUG, 'park', license_plate=event.license_plate,
+                              level_id=event.level_id, spot_number=event.spot_num,
+                              ticket_id=event.ticket_id)
+        return event.ticket_id
+
+    def park_many(self, vehicles: List[Vehicle]) -> List[Union[str, ParkingException]]:
+        """
+        Park a batch of vehicles with one allocation pass and ONE storage transaction.
+        Returns one entry per vehicle, in order: the ticket_id, or the exception
+        (VehicleAlreadyParkedException / ParkingFullException) explaining why it was not parked.
+        """
+        self._ensure_hydrated()
+        results: List[Union[str, ParkingException]] = []
+        events: List[ParkEvent] = []
+        bookings = []
+        now = self.clock.now()
+        self._refresh_holds(now)
+        with self._all_levels_locked():
+            for vehicle in vehicles:
+                try:
+                    self._reserve_plate(vehicle.license_plate)
+                except VehicleAlreadyParkedException as e:
+                    results.append(e)
+                    continue
+
+                spot = None
+                booking = self.reservations.for_plate(vehicle.license_plate, now)
+                if booking is not None and vehicle.can_fit_in_spot(booking.spot_type):
+                    level = self.levels[self._level_pos[booking.level_id]]
+                    spot = self._free_spot(level, booking.spot_type, now, booking)
+                    choice = (level, booking.spot_type)
+                if spot is None:
+                    fit_types = [t for t in SpotType if vehicle.can_fit_in_spot(t)]
+                    choice = self.placement_policy.select(self.levels, self.capacity, fit_types)
+                    spot = self._free_spot(choice[0], choice[1], now, booking) if choice and choice[1] else None
+                if spot is None:
+                    self._release_plate(vehicle.license_plate)
+                    self.instrumentation.count('park_rejected_full')
+                    self.instrumentation.event(logging.INFO, 'park_rejected',
+                                               license_plate=vehicle.license_plate, reason='full')
+                    results.append(ParkingFullException("No suitable spot available for this vehicle type"))
+                    continue
+
+                event = self._occupy(choice[0], spot, vehicle)
+                events.append(event)
+                results.append(event.ticket_id)
+                if booking is not None:
+                    bookings.append(booking)
+
+            if events:
+                with self.instrumentation.timer('persist_park'):
+                    self.storage.save_events(events)
+        for booking in bookings:
+            self._check_in(booking)
+        self.instrumentation.event(logging.DEBUG, 'park_many', vehicles=len(vehicles), parked=len(events))
+        return results
+
+    def _reserve_plate(self, license_plate: str):
+        """Atomically mark a plate as being parked; raises if it already is."""
+        with self._plates_lock:
+            if license_plate in self._plate_index:
+                self.instrumentation.count('park_rejected_already_parked')
+                self.instrumentation.event(logging.INFO, 'park_rejected', license_plate=license_plate,
+                                           reason='already_parked')
+                raise VehicleAlreadyParkedException(
+                    f"Vehicle with license plate {license_plate} is already parked!"
+                )
+            self._plate_index[license_plate] = None
+
+    def _release_plate(self, license_plate: str):
+        with self._plates_lock:
+            self._plate_index.pop(license_plate, None)
+
+    def find_vehicle(self, license_plate: str) -> Optional[dict]:
+        """
+        Where is this vehicle? O(1) lookup in the plate index, no storage access.
+        Returns {'license_plate', 'level_id', 'spot_number', 'ticket_id'} or None if not parked.
+        """
+        self._ensure_hydrated()
+        entry = self._plate_index.get(license_plate)
+        if entry is None:
+            return None
+        level_id, spot_num, ticket_id = entry
+        return {'license_plate': license_plate, 'level_id': level_id,
+                'spot_number': spot_num, 'ticket_id': ticket_id}
+
+    @contextmanager
+    def _all_levels_locked(self):
+        """Hold every level lock (always acquired in level order, so batches can't deadlock)."""
+        with ExitStack() as stack:
+            for level in self.levels:
+                stack.enter_context(level.lock)
+            yield
+
+    def _occupy(self, level: Level, spot: ParkingSpot, vehicle: Vehicle) -> ParkEvent:
+        """Occupy a reserved spot and issue its ticket; returns the event to persist. Caller holds level.lock."""
+        now = self.clock.now()
+        level.occupy_spot(spot, vehicle, now)  # Updates spot.vehicle, is_occupied and the level's free index
+        self._update_capacity(level, spot.spot_type)
+
+        # Create ticket
+        ticket = ParkingTicket(self.new_id(), now)
+        spot_id = level.store.spot_id(spot.index)
+        self.active_tickets[ticket.ticket_id] = TicketEntry(level.level_id, spot.number, spot.index, spot_id)
+        # The plate is already reserved by this caller, so no other thread writes this key
+        self._plate_index[vehicle.license_plate] = (level.level_id, spot.number, ticket.ticket_id)
+        return ParkEvent.from_vehicle(level.level_id, spot.number, vehicle, ticket.ticket_id, spot_id)
+
+    def _update_capacity(self, level: Level, spot_type: SpotType, now: Optional[datetime] = None):
+        """
+        Refresh the lot-wide capacity summary after a spot on level changed state.
+        Spots held for bookings starting within RESERVATION_WALK_IN_MINUTES of `now` (default: the
+        clock) don't count as free for walk-ins.
+        Caller holds level.lock, so the count and the bit can't be overtaken by a park/unpark.
+        """
+        free = level.free_count(spot_type)
+        if free and len(self.reservations):
+            free -= self.reservations.held(level.level_id, spot_type, now or self.clock.now())
+        self.capacity.update(self._level_pos[level.level_id], spot_type, free)
+        self.availability.notify()
 
-                # Create ticket
-                ticket = ParkingTicket()
-                self.active_tickets[ticket.ticket_id] = (level.level_id, spot.number)
+    def _free_spot(self, level: Level, spot_type: SpotType, now: datetime,
+                   booking: Optional[Reservation] = None) -> Optional[ParkingSpot]:
+        """
+        Lowest free spot of spot_type on level that isn't held for a reservation
+        (booking: the arriving vehicle's own reservation, whose hold it may use). Caller holds level.lock.
+        """
+        if level.free_count(spot_type) <= self.reservations.held(level.level_id, spot_type, now, booking):
+            return None
+        return level.find_spot_of_type(spot_type)
+
+    # ---- reservations ----------------------------------------------------------
+
+    def reserve(self, license_plate: str, spot_type: SpotType, start: datetime, end: datetime,
+                level_id: Optional[int] = None) -> Reservation:
+        """
+        Hold one spot_type spot (on level_id, or the lowest level with room) for license_plate
+        during [start, end). Walk-ins leave held spots free; when the plate arrives (from
+        RESERVATION_EARLY_ARRIVAL_MINUTES before start until end) park_vehicle gives it the held spot.
+        Raises ReservationException for a bad window / unknown level / overlapping booking,
+        ParkingFullException if nothing can be booked.
+        """
+        if not start < end or end <= self.clock.now():
+            raise ReservationException("Reservation window must end after it starts, in the future")
+        if level_id is not None and level_id not in self._level_pos:
+            raise ReservationException(f"Level {level_id} not found")
+        level_ids = [level_id] if level_id is not None else [level.level_id for level in self.levels]
+        reservation = self.reservations.add(license_plate, spot_type, start, end, level_ids)
+        try:
+            self.storage.save_reservation(reservation)
+        except BaseException:
+            self.reservations.remove(reservation.reservation_id)
+            raise
+        self._refresh_level(reservation.level_id, spot_type)
+        return reservation
+
+    def cancel_reservation(self, reservation_id: str) -> Reservation:
+        reservation = self.reservations.remove(reservation_id)
+        if reservation is None:
+            raise ReservationException("Invalid or expired reservation")
+        self.storage.delete_reservations([reservation_id])
+        self._refresh_level(reservation.level_id, reservation.spot_type)
+        return reservation
 
-                # Persist to database
-                save_park_to_db(level.level_id, spot.number, vehicle, ticket.ticket_id)
+    def _refresh_level(self, level_id: int, spot_type: SpotType):
+        level = self.levels[self._level_pos[level_id]]
+        with level.lock:
+            self._update_capacity(level, spot_type)
 
-                return ticket.ticket_id
+    def reservable(self, spot_type: SpotType, start: datetime, end: datetime) -> Dict[int, int]:
+        """{level_id: spot_type spots still bookable for the whole of [start, end)}; O(window buckets) per level."""
+        return {level.level_id: self.reservations.bookable(level.level_id, spot_type, start, end)
+                for level in self.levels}
 
-        raise ParkingFullException("No suitable spot available for this vehicle type")
+    def _check_in(self, booking: Reservation):
+        """The booked vehicle has parked: its hold ends."""
+        if self.reservations.remove(booking.reservation_id) is not None:
+            self.storage.delete_reservations([booking.reservation_id])
+
+    def _refresh_holds(self, now: datetime):
+        """
+        Once per reservation time bucket: drop expired reservations and recompute the
+        capacity bits, since the set of holds in force changes at bucket boundaries.
+        """
+        bucket = self.reservations.bucket_of(now)
+        if bucket == self._holds_bucket:
+            return
+        self._holds_bucket = bucket
+        expired = self.reservations.expire(now)
+        if expired:
+            self.storage.delete_reservations([r.reservation_id for r in expired])
+        for level in self.levels:
+            with level.lock:
+                for spot_type in SpotType:
+                    self._update_capacity(level, spot_type, now)
 
     def unpark_vehicle(self, ticket_id: str) -> str:
         """
         Unpark vehicle using ticket_id.
         Returns fee message on success.
         """
-        if ticket_id not in self.active_tickets:
+        self._ensure_hydrated()
+        start = time.perf_counter()
+        level, spot, entry = self._redeem_ticket(ticket_id)
+
+        with level.lock:
+            exit_time = self.clock.now()
+            fee = self._vacate(level, spot, exit_time)
+
+            # Persist unpark (queued for the background writer in write-behind mode)
+            with self.instrumentation.timer('persist_unpark'):
+                self.storage.save_unpark(UnparkEvent(ticket_id, entry.spot_id, exit_time.isoformat(), fee))
+
+        self.instrumentation.observe('unpark', time.perf_counter() - start)
+        self.instrumentation.event(logging.DEBUG, 'unpark', ticket_id=ticket_id, level_id=entry.level_id,
+                                   spot_number=entry.spot_number, fee=fee)
+
+        return f"Vehicle unparked successfully. Total fee: ${fee:.2f}"
+
+    def unpark_many(self, ticket_ids: List[str]) -> List[Union[str, ParkingException]]:
+        """
+        Unpark a batch of tickets with ONE storage transaction.
+        Returns one entry per ticket, in order: the fee message, or the exception
+        (InvalidTicketException / SpotNotFoundException) explaining why it failed.
+        """
+        self._ensure_hydrated()
+        results: List[Union[str, ParkingException]] = []
+        events: List[UnparkEvent] = []
+        with self._all_levels_locked():
+            for ticket_id in ticket_ids:
+                try:
+                    level, spot, entry = self._redeem_ticket(ticket_id)
+                except (InvalidTicketException, SpotNotFoundException) as e:
+                    results.append(e)
+                    continue
+                exit_time = self.clock.now()
+                fee = self._vacate(level, spot, exit_time)
+                events.append(UnparkEvent(ticket_id, entry.spot_id, exit_time.isoformat(), fee))
+                results.append(f"Vehicle unparked successfully. Total fee: ${fee:.2f}")
+
+            if events:
+                with self.instrumentation.timer('persist_unpark'):
+                    self.storage.save_events(events)
+        self.instrumentation.event(logging.DEBUG, 'unpark_many', tickets=len(ticket_ids), unparked=len(events))
+        return results
+
+    def _redeem_ticket(self, ticket_id: str) -> Tuple[Level, ParkingSpot, TicketEntry]:
+        """Remove an active ticket and return the level, spot and entry it refers to (O(1), no scan)."""
+        entry = self.active_tickets.pop(ticket_id, None)  # atomic: only one caller can redeem a ticket
+        if entry is None:
+            self.instrumentation.count('unpark_rejected_invalid_ticket')
+            self.instrumentation.event(logging.INFO, 'unpark_rejected', ticket_id=ticket_id, reason='invalid_ticket')
             raise InvalidTicketException("Invalid or expired ticket")
 
-        level_id, spot_num = self.active_tickets.pop(ticket_id)
+        pos = self._level_pos.get(entry.level_id)
+        level = self.levels[pos] if pos is not None else None
+        if level is None or not 0 <= entry.spot_index < len(level.spots):
+            raise SpotNotFoundException(f"Spot {entry.spot_number} on level {entry.level_id} not found")
+        return level, level.spots[entry.spot_index], entry
 
-        level = self.levels[level_id - 1]  # assuming level_id starts from 1
-        spot: ParkingSpot | None = next(
-            (s for s in level.spots if s.number == spot_num), None
-        )
+    def _vacate(self, level: Level, spot: ParkingSpot, exit_time: datetime) -> float:
+        """Free the spot in memory and return the fee for a stay ending at exit_time. Caller holds level.lock."""
+        plate = level.store.plate(spot.index)
+        if plate is not None:
+            self._release_plate(plate)
+        fee = level.release_spot(spot, HOURLY_FEE_RATE, self.billing, exit_time)
+        self._update_capacity(level, spot.spot_type)
+        return fee
 
-        if not spot:
-            raise SpotNotFoundException(f"Spot {spot_num} on level {level_id} not found")
+    def settle_open_tickets(self, as_of: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Fee every active ticket would pay if it exited at as_of (default: now), without unparking.
+        For nightly reconciliation / revenue forecasting: the lot is snapshotted under all
+        level locks, then priced in one vectorized BillingEngine.fees call.
+        Returns {ticket_id: fee}.
+        """
+        self._ensure_hydrated()
+        as_of_us = to_epoch_us(as_of or self.clock.now())
+        ticket_ids, codes, entries = [], [], []
+        with self._all_levels_locked():
+            for ticket_id, entry in self.active_tickets.items():
+                store = self.levels[self._level_pos[entry.level_id]].store
+                if not store.occupied[entry.spot_index]:
+                    continue
+                ticket_ids.append(ticket_id)
+                codes.append(store.vehicle_types[entry.spot_index])
+                entries.append(store.entry_us[entry.spot_index])
 
-        # Calculate fee and unpark in memory
-        fee = spot.unpark(HOURLY_FEE_RATE)
+        fees = self.billing.fees(codes, entries, [as_of_us] * len(entries))
+        return {ticket_id: float(fee) for ticket_id, fee in zip(ticket_ids, fees)}
 
-        # Persist unpark to database
-        save_unpark_to_db(ticket_id)
+    def completed_sessions(self, start: datetime, end: datetime,
+                           license_plate: Optional[str] = None) -> Iterator[CompletedSession]:
+        """
+        Stream finished stays overlapping [start, end) from the storage archive (optionally one plate).
+        Feed it to the analytics functions; nothing is loaded into memory up front.
+        """
+        return self.storage.iter_sessions(start, end, license_plate)
 
-        from parking_lot_system.db import get_connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT license_plate, vehicle_type FROM parked_vehicles")
-        remaining = cursor.fetchall()
-        print("Remaining parked vehicles in DB after this unpark:", remaining)
-        conn.close()
+    def flush(self):
+        """Wait until every accepted park/unpark is durable in storage."""
+        self.storage.flush()
 
-        return f"Vehicle unparked successfully. Total fee: ${fee:.2f}"
+    def close(self):
+        """Flush pending writes and release storage resources. Call on shutdown."""
+        self.storage.close()
 
     def get_parking_status(self) -> dict:
         """Return occupancy summary for API - with string keys."""
@@ -124,7 +535,7 @@ class ParkingLot:
 
             status[f'level_{level.level_id}'] = {
                 'available_spots': avail_str,
-                'total_spots': len(level.spots),
-                'occupied_count': sum(1 for s in level.spots if s.is_occupied)
+                'total_spots': level.total_spots,
+                'occupied_count': level.occupied_count()  # O(1) counter, no spot scan
             }
         return status
\ No newline at end of file
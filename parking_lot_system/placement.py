@@ -0,0 +1,127 @@
+# Lot-wide capacity summary and pluggable placement policies
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from .enums import SpotType
+from .level import Level
+
+
+class CapacityIndex:
+    """
+    Bitset over levels for each SpotType.
+    Bit i of the mask for a SpotType is set while self.levels[i] has at least
+    one free spot of that type, so the allocator can jump straight to a level
+    with capacity instead of scanning every level.
+    Updates take a short lock; reads are lock-free and may be momentarily stale,
+    so callers re-check the chosen level under its own lock.
+    """
+
+    def __init__(self, levels: Sequence[Level]):
+        self._lock = threading.Lock()
+        self._masks: Dict[SpotType, int] = {t: 0 for t in SpotType}
+        for pos, level in enumerate(levels):
+            for spot_type in SpotType:
+                self.update(pos, spot_type, level.free_count(spot_type))
+
+    def update(self, level_pos: int, spot_type: SpotType, free_count: int):
+        """Record the current free count of spot_type on the level at level_pos."""
+        bit = 1 << level_pos
+        with self._lock:
+            if free_count > 0:
+                self._masks[spot_type] |= bit
+            else:
+                self._masks[spot_type] &= ~bit
+
+    def mask(self, spot_types: Iterable[SpotType]) -> int:
+        """Bitset of levels with a free spot of any of the given types."""
+        result = 0
+        for spot_type in spot_types:
+            result |= self._masks[spot_type]
+        return result
+
+    def has(self, level_pos: int, spot_type: SpotType) -> bool:
+        """Whether the level at level_pos has a free spot of spot_type."""
+        return bool(self._masks[spot_type] >> level_pos & 1)
+
+    def first_level(self, spot_types: Iterable[SpotType]) -> Optional[int]:
+        """Position of the lowest level with a free spot of any of the given types."""
+        mask = self.mask(spot_types)
+        if not mask:
+            return None
+        return (mask & -mask).bit_length() - 1
+
+    @staticmethod
+    def iter_levels(mask: int) -> Iterator[int]:
+        """Yield the level positions set in mask, lowest first."""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+
+class PlacementPolicy(ABC):
+    """Chooses the level and SpotType a vehicle should be parked in."""
+
+    @abstractmethod
+    def select(self, levels: Sequence[Level], capacity: CapacityIndex,
+               fit_types: Sequence[SpotType]) -> Optional[Tuple[Level, SpotType]]:
+        """
+        fit_types are the spot types the vehicle fits in, smallest first.
+        Returns (level, spot_type) or None if no level can take the vehicle.
+        """
+        pass
+
+    @staticmethod
+    def _smallest_free_type(capacity: CapacityIndex, level_pos: int,
+                            fit_types: Sequence[SpotType]) -> Optional[SpotType]:
+        # Read from the capacity bits rather than the level's counters: the lot clears a bit
+        # when the remaining spots of a type are held for reservations
+        for spot_type in fit_types:
+            if capacity.has(level_pos, spot_type):
+                return spot_type
+        return None
+
+
+class LowestLevelFirst(PlacementPolicy):
+    """Lowest level with any fitting spot, then the smallest fitting spot on it (original behaviour)."""
+
+    def select(self, levels, capacity, fit_types):
+        pos = capacity.first_level(fit_types)
+        if pos is None:
+            return None
+        return levels[pos], self._smallest_free_type(capacity, pos, fit_types)
+
+
+class BestFit(PlacementPolicy):
+    """Smallest fitting spot type anywhere in the lot, lowest level first within a type."""
+
+    def select(self, levels, capacity, fit_types):
+        for spot_type in fit_types:
+            pos = capacity.first_level((spot_type,))
+            if pos is not None:
+                return levels[pos], spot_type
+        return None
+
+
+class BalancedLoad(PlacementPolicy):
+    """Least occupied level (by ratio) that can take the vehicle, smallest fitting spot on it."""
+
+    def select(self, levels, capacity, fit_types):
+        best: Optional[int] = None
+        best_ratio = 2.0
+        for pos in capacity.iter_levels(capacity.mask(fit_types)):
+            level = levels[pos]
+            ratio = level.occupied_count() / level.total_spots
+            if ratio < best_ratio:
+                best, best_ratio = pos, ratio
+        if best is None:
+            return None
+        return levels[best], self._smallest_free_type(capacity, best, fit_types)
+
+
+PLACEMENT_POLICIES = {
+    'lowest_level': LowestLevelFirst,
+    'best_fit': BestFit,
+    'balanced': BalancedLoad,
+}
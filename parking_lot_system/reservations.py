@@ -0,0 +1,183 @@
+# Reservations: time-bucketed spot holds per (level, SpotType)
+import heapq
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .enums import SpotType
+from .clock import uuid_ids
+from .exceptions import ParkingFullException, ReservationException
+from .config import RESERVATION_BUCKET_MINUTES, RESERVATION_EARLY_ARRIVAL_MINUTES, RESERVATION_WALK_IN_MINUTES
+
+_EPOCH = datetime(1970, 1, 1)  # naive, like every timestamp in the lot
+
+
+class Reservation(NamedTuple):
+    """One booked spot of spot_type on level_id for license_plate during [start, end)."""
+    reservation_id: str
+    license_plate: str
+    level_id: int
+    spot_type: SpotType
+    start: datetime
+    end: datetime
+
+
+class ReservationBook:
+    """
+    Hold counts per (level, SpotType) in fixed time buckets (RESERVATION_BUCKET_MINUTES).
+
+    A reservation counts in every bucket its window touches (rounded outwards), so
+    "how many LARGE spots on level 2 are still bookable from 14:00 to 18:00" is the
+    bookable capacity minus the largest count in 16 buckets: the cost depends on the
+    window length, never on how many reservations exist. The same counts tell the
+    allocator how many spots to keep free for bookings (held()): the peak over the
+    next walk_in_minutes, so a walk-in expected to stay that long never takes a
+    spot a booking needs when it arrives.
+    Reservations leave the book when the vehicle checks in, when cancelled, or once
+    their window has passed (expire()).
+    """
+
+    def __init__(self, capacities: Dict[Tuple[int, SpotType], int],
+                 bucket_minutes: float = RESERVATION_BUCKET_MINUTES,
+                 early_arrival_minutes: float = RESERVATION_EARLY_ARRIVAL_MINUTES,
+                 walk_in_minutes: float = RESERVATION_WALK_IN_MINUTES,
+                 id_generator: Callable[[], str] = uuid_ids):
+        self.capacities = capacities  # (level_id, SpotType) -> spots that may be booked at once
+        self.bucket = timedelta(minutes=bucket_minutes)
+        self.early_arrival = timedelta(minutes=early_arrival_minutes)
+        self.lookahead = max(1, math.ceil(timedelta(minutes=walk_in_minutes) / self.bucket))  # buckets
+        self.new_id = id_generator
+        self._holds: Dict[Tuple[int, SpotType], Dict[int, int]] = {key: {} for key in capacities}
+        self._by_id: Dict[str, Reservation] = {}
+        self._by_plate: Dict[str, List[str]] = {}
+        self._ends: List[Tuple[datetime, str]] = []  # min-heap of (end, reservation_id) for expiry
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def bucket_of(self, at: datetime) -> int:
+        return (at - _EPOCH) // self.bucket
+
+    def _buckets(self, start: datetime, end: datetime) -> range:
+        return range(self.bucket_of(start), math.ceil((end - _EPOCH) / self.bucket))
+
+    def _bookable(self, key: Tuple[int, SpotType], start: datetime, end: datetime) -> int:
+        holds = self._holds[key]
+        peak = max((holds.get(b, 0) for b in self._buckets(start, end)), default=0) if holds else 0
+        return self.capacities[key] - peak
+
+    def _apply(self, reservation: Reservation, delta: int):
+        holds = self._holds[(reservation.level_id, reservation.spot_type)]
+        for b in self._buckets(reservation.start, reservation.end):
+            count = holds.get(b, 0) + delta
+            if count:
+                holds[b] = count
+            else:
+                del holds[b]
+
+    # ---- queries -------------------------------------------------------------
+
+    def bookable(self, level_id: int, spot_type: SpotType, start: datetime, end: datetime) -> int:
+        """How many more spot_type spots on level_id can be reserved for the whole of [start, end)."""
+        with self._lock:
+            return self._bookable((level_id, spot_type), start, end)
+
+    def held(self, level_id: int, spot_type: SpotType, at: datetime,
+             excluding: Optional[Reservation] = None) -> int:
+        """
+        Spots of spot_type on level_id a walk-in arriving at `at` must leave free: the most
+        bookings (not checked in yet) holding at once from `at` over the next walk_in_minutes.
+        excluding: the reservation of the vehicle being parked, which may use its own hold.
+        """
+        if not self._by_id:
+            return 0
+        first = self.bucket_of(at)
+        own = (self._buckets(excluding.start, excluding.end)
+               if excluding is not None and excluding.level_id == level_id and excluding.spot_type == spot_type
+               else range(0))
+        with self._lock:
+            holds = self._holds.get((level_id, spot_type))
+            if not holds:
+                return 0
+            return max(holds.get(b, 0) - (b in own) for b in range(first, first + self.lookahead))
+
+    def for_plate(self, license_plate: str, at: datetime) -> Optional[Reservation]:
+        """The plate's reservation valid at `at` (arrivals up to early_arrival before the start count)."""
+        ids = self._by_plate.get(license_plate)
+        if not ids:
+            return None
+        with self._lock:
+            for reservation_id in self._by_plate.get(license_plate, ()):
+                reservation = self._by_id[reservation_id]
+                if reservation.start - self.early_arrival <= at < reservation.end:
+                    return reservation
+        return None
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        return self._by_id.get(reservation_id)
+
+    # ---- changes ---------------------------------------------------------------
+
+    def add(self, license_plate: str, spot_type: SpotType, start: datetime, end: datetime,
+            level_ids: Iterable[int]) -> Reservation:
+        """
+        Book the first of level_ids with a spot_type spot bookable for the whole window.
+        Raises ReservationException if the plate already has an overlapping booking,
+        ParkingFullException if no level has room.
+        """
+        with self._lock:
+            for reservation_id in self._by_plate.get(license_plate, ()):
+                other = self._by_id[reservation_id]
+                if other.start < end and start < other.end:
+                    raise ReservationException(
+                        f"Vehicle {license_plate} already has reservation {reservation_id} in that window"
+                    )
+            for level_id in level_ids:
+                key = (level_id, spot_type)
+                if key in self.capacities and self._bookable(key, start, end) > 0:
+                    reservation = Reservation(self.new_id(), license_plate, level_id, spot_type, start, end)
+                    self._insert(reservation)
+                    return reservation
+        raise ParkingFullException(f"No {spot_type.name} spot can be reserved for that window")
+
+    def restore(self, reservations: Iterable[Reservation]):
+        """Re-insert persisted reservations (no capacity check: they were accepted before)."""
+        with self._lock:
+            for reservation in reservations:
+                if (reservation.level_id, reservation.spot_type) in self.capacities:
+                    self._insert(reservation)
+
+    def _insert(self, reservation: Reservation):
+        self._by_id[reservation.reservation_id] = reservation
+        self._by_plate.setdefault(reservation.license_plate, []).append(reservation.reservation_id)
+        heapq.heappush(self._ends, (reservation.end, reservation.reservation_id))
+        self._apply(reservation, 1)
+
+    def remove(self, reservation_id: str) -> Optional[Reservation]:
+        """Drop a reservation (check-in or cancellation); returns it, or None if unknown."""
+        with self._lock:
+            return self._remove(reservation_id)
+
+    def _remove(self, reservation_id: str) -> Optional[Reservation]:
+        reservation = self._by_id.pop(reservation_id, None)
+        if reservation is None:
+            return None
+        ids = self._by_plate[reservation.license_plate]
+        ids.remove(reservation_id)
+        if not ids:
+            del self._by_plate[reservation.license_plate]
+        self._apply(reservation, -1)  # its entry in self._ends is skipped lazily
+        return reservation
+
+    def expire(self, now: datetime) -> List[Reservation]:
+        """Remove and return reservations whose window ended by `now` (no-shows)."""
+        expired = []
+        with self._lock:
+            while self._ends and self._ends[0][0] <= now:
+                _, reservation_id = heapq.heappop(self._ends)
+                reservation = self._remove(reservation_id)
+                if reservation is not None:
+                    expired.append(reservation)
+        return expired
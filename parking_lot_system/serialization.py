@@ -0,0 +1,84 @@
+# JSON encoding for API responses (orjson if installed, stdlib json otherwise) and gzip helpers
+import gzip
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from .config import JSON_ENCODER, GZIP_MIN_BYTES, GZIP_LEVEL
+
+try:  # optional: several times faster than json.dumps for the status payloads
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(obj: Any):
+    """Types the API returns besides plain JSON: datetimes as ISO strings, enums by value (as orjson does)."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    # OPT_NON_STR_KEYS: int keys (e.g. {level_id: count}) become strings, as with json.dumps
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+ENCODERS = {'json': _json_dumps}
+if orjson is not None:
+    ENCODERS['orjson'] = _orjson_dumps
+
+_dumps: Callable[[Any], bytes] = _json_dumps
+
+
+def use_encoder(encoder):
+    """
+    Select the encoder behind dumps(): a name from ENCODERS, 'auto' (orjson if installed)
+    or any callable obj -> bytes. Returns the encoder now in use.
+    """
+    global _dumps
+    if encoder == 'auto':
+        encoder = 'orjson' if 'orjson' in ENCODERS else 'json'
+    if isinstance(encoder, str):
+        if encoder not in ENCODERS:
+            raise ValueError(f"Unknown JSON encoder '{encoder}' (available: {', '.join(ENCODERS)})")
+        encoder = ENCODERS[encoder]
+    _dumps = encoder
+    return encoder
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON with the selected encoder."""
+    return _dumps(obj)
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def gzip_body(body: bytes, min_bytes: int = GZIP_MIN_BYTES, level: int = GZIP_LEVEL) -> Optional[bytes]:
+    """body gzip-compressed, or None if it is too small to be worth it. mtime=0 keeps the output stable."""
+    if len(body) < min_bytes:
+        return None
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header value allows gzip (ignores q-values other than q=0)."""
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+use_encoder(JSON_ENCODER)
@@ -0,0 +1,328 @@
+# Multi-process sharded lot: levels are partitioned across worker processes behind a router
+import atexit
+import multiprocessing
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .enums import VehicleType
+from .exceptions import (
+    ParkingException, ParkingFullException, InvalidTicketException, VehicleAlreadyParkedException
+)
+from .models import Vehicle, make_vehicle
+from .spot_store import SPOT_TYPES
+
+TICKET_SEPARATOR = ':'  # shard ticket = "<shard id>:<worker ticket id>"
+
+
+def _publish_capacity(lot, shard_id: int, free_counts):
+    """Write this shard's free spot count per SpotType into the shared array (single writer per row)."""
+    base = shard_id * len(SPOT_TYPES)
+    for code, spot_type in enumerate(SPOT_TYPES):
+        free_counts[base + code] = sum(level.free_count(spot_type) for level in lot.levels)
+
+
+def _ticket_plate(lot, levels_by_id, ticket_id: str) -> Optional[str]:
+    """Plate parked under an active ticket, None if the ticket is unknown."""
+    entry = lot.active_tickets.get(ticket_id)
+    if entry is None:
+        return None
+    return levels_by_id[entry.level_id].store.plate(entry.spot_index)
+
+
+def _worker_main(shard_id: int, num_levels: int, spots_per_level: int, db_file: str,
+                 write_behind: bool, free_counts, conn):
+    """Worker process: owns one ParkingLot (local level ids 1..num_levels) and serves router requests."""
+    from .parking_lot import ParkingLot
+    from .storage import SQLiteStorage
+
+    # Eager: the router needs every parked plate right away
+    lot = ParkingLot(num_levels, spots_per_level, storage=SQLiteStorage(db_file, write_behind=write_behind),
+                     lazy=False)
+    levels_by_id = {level.level_id: level for level in lot.levels}
+    _publish_capacity(lot, shard_id, free_counts)
+    # Ready: report parked plates so the router can rebuild its plate index
+    conn.send(('ok', [_ticket_plate(lot, levels_by_id, t) for t in list(lot.active_tickets)]))
+
+    def unpark(ticket_id):
+        """(fee message, plate) so the router can free the plate."""
+        plate = _ticket_plate(lot, levels_by_id, ticket_id)
+        return lot.unpark_vehicle(ticket_id), plate
+
+    def unpark_many(ticket_ids):
+        plates = [_ticket_plate(lot, levels_by_id, t) for t in ticket_ids]
+        return [outcome if isinstance(outcome, Exception) else (outcome, plate)
+                for outcome, plate in zip(lot.unpark_many(ticket_ids), plates)]
+
+    handlers = {
+        'park': lambda vtype, plate: lot.park_vehicle(make_vehicle(VehicleType[vtype], plate)),
+        'unpark': unpark,
+        'park_many': lambda items: lot.park_many([make_vehicle(VehicleType[t], p) for t, p in items]),
+        'unpark_many': unpark_many,
+        'find': lot.find_vehicle,
+        'status': lot.get_parking_status,
+        'flush': lot.flush,
+    }
+    mutating = {'park', 'unpark', 'park_many', 'unpark_many'}
+    while True:
+        try:
+            op, args = conn.recv()
+        except EOFError:  # router went away
+            op, args = 'close', ()
+        if op == 'close':
+            lot.close()
+            conn.send(('ok', None))
+            return
+        try:
+            result = ('ok', handlers[op](*args))
+        except ParkingException as e:
+            result = ('err', e)
+        except Exception as e:  # unexpected: surface to the router as a generic error
+            result = ('err', ParkingException(f"Shard {shard_id} failed: {e!r}"))
+        if op in mutating:
+            _publish_capacity(lot, shard_id, free_counts)
+        conn.send(result)
+
+
+class _Shard:
+    """Router-side handle of one worker: its pipe (one request at a time) and level id offset."""
+
+    def __init__(self, shard_id: int, first_level_id: int, num_levels: int, process, conn):
+        self.shard_id = shard_id
+        self.level_offset = first_level_id - 1
+        self.num_levels = num_levels
+        self.process = process
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def call(self, op: str, *args):
+        with self.lock:
+            self.conn.send((op, args))
+            status, result = self.conn.recv()
+        if status == 'err':
+            raise result
+        return result
+
+
+class ShardedParkingLot:
+    """
+    ParkingLot API over several worker processes, so gates scale with cores instead of one GIL.
+
+    Levels are split into contiguous groups, one per worker. Each worker owns a regular
+    ParkingLot with its own SQLite file ({data_dir}/shard_{k}.db) and local level ids
+    1..n; the router reports global ids (local id + the shard's offset).
+    Routing:
+      - park: each worker publishes its free spot count per SpotType into a shared
+        multiprocessing.Array after every change; the router sends the vehicle to the
+        shard with the most free fitting spots and retries elsewhere if that read was stale.
+      - unpark: tickets are "<shard id>:<worker ticket>", so the prefix names the shard.
+    Duplicate plates are rejected by the router's plate index (plate -> shard), which
+    is rebuilt from the workers on startup. One router process per set of shard files.
+    """
+
+    def __init__(self, num_levels: int, spots_per_level: int, num_shards: Optional[int] = None,
+                 data_dir: str = 'parking_shards', write_behind: bool = False,
+                 mp_context: Optional[str] = None):
+        num_shards = min(num_shards or os.cpu_count() or 1, num_levels)
+        os.makedirs(data_dir, exist_ok=True)
+        ctx = multiprocessing.get_context(mp_context)
+        self._types_per_shard = len(SPOT_TYPES)
+        self._free_counts = ctx.Array('i', num_shards * self._types_per_shard, lock=False)
+        self._plates: Dict[str, Optional[int]] = {}  # plate -> shard id (None while a park is in flight)
+        self._plates_lock = threading.Lock()
+        self._closed = False
+
+        self.shards: List[_Shard] = []
+        first_level = 1
+        for shard_id in range(num_shards):
+            levels = num_levels // num_shards + (1 if shard_id < num_levels % num_shards else 0)
+            router_conn, worker_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker_main, name=f"parking-shard-{shard_id}", daemon=True,
+                args=(shard_id, levels, spots_per_level, os.path.join(data_dir, f"shard_{shard_id}.db"),
+                      write_behind, self._free_counts, worker_conn),
+            )
+            process.start()
+            self.shards.append(_Shard(shard_id, first_level, levels, process, router_conn))
+            first_level += levels
+
+        for shard in self.shards:  # wait for every worker to load, collect parked plates
+            status, plates = shard.conn.recv()
+            for plate in plates:
+                self._plates[plate] = shard.shard_id
+        atexit.register(self.close)
+
+    # ---- routing helpers ---------------------------------------------------
+
+    def _free(self, shard_id: int, fit_codes: Sequence[int]) -> int:
+        base = shard_id * self._types_per_shard
+        return sum(self._free_counts[base + code] for code in fit_codes)
+
+    def _candidates(self, vehicle: Vehicle, pending: Optional[Dict[int, int]] = None) -> List[_Shard]:
+        """
+        Shards that (per the shared counts) can take the vehicle, most free fitting spots first.
+        pending: vehicles already planned per shard in the current batch, not yet in the counts.
+        """
+        fit_codes = [code for code, t in enumerate(SPOT_TYPES) if vehicle.can_fit_in_spot(t)]
+        pending = pending or {}
+        scored = [(self._free(shard.shard_id, fit_codes) - pending.get(shard.shard_id, 0), shard)
+                  for shard in self.shards]
+        return [shard for free, shard in sorted(scored, key=lambda item: -item[0]) if free > 0]
+
+    def _reserve_plate(self, license_plate: str):
+        with self._plates_lock:
+            if license_plate in self._plates:
+                raise VehicleAlreadyParkedException(
+                    f"Vehicle with license plate {license_plate} is already parked!"
+                )
+            self._plates[license_plate] = None
+
+    def _set_plate(self, license_plate: str, shard_id: Optional[int]):
+        with self._plates_lock:
+            if shard_id is None:
+                self._plates.pop(license_plate, None)
+            else:
+                self._plates[license_plate] = shard_id
+
+    def _split_ticket(self, ticket_id: str) -> Tuple[_Shard, str]:
+        prefix, sep, local_ticket = str(ticket_id).partition(TICKET_SEPARATOR)
+        if not sep or not prefix.isdigit() or int(prefix) >= len(self.shards):
+            raise InvalidTicketException("Invalid or expired ticket")
+        return self.shards[int(prefix)], local_ticket
+
+    @staticmethod
+    def _ticket(shard: _Shard, local_ticket: str) -> str:
+        return f"{shard.shard_id}{TICKET_SEPARATOR}{local_ticket}"
+
+    # ---- ParkingLot API ----------------------------------------------------
+
+    def park_vehicle(self, vehicle: Vehicle) -> str:
+        """Park in the shard with the most free fitting spots; returns a shard-prefixed ticket."""
+        self._reserve_plate(vehicle.license_plate)
+        try:
+            for shard in self._candidates(vehicle):
+                try:
+                    local_ticket = shard.call('park', vehicle.vehicle_type.name, vehicle.license_plate)
+                except ParkingFullException:
+                    continue  # stale count: another gate filled it, try the next shard
+                self._set_plate(vehicle.license_plate, shard.shard_id)
+                return self._ticket(shard, local_ticket)
+            raise ParkingFullException("No suitable spot available for this vehicle type")
+        except BaseException:
+            self._set_plate(vehicle.license_plate, None)
+            raise
+
+    def unpark_vehicle(self, ticket_id: str) -> str:
+        shard, local_ticket = self._split_ticket(ticket_id)
+        message, plate = shard.call('unpark', local_ticket)
+        self._set_plate(plate, None)
+        return message
+
+    def park_many(self, vehicles: List[Vehicle]) -> List[Union[str, ParkingException]]:
+        """Vehicles are grouped per shard and sent as one batch (one transaction) per shard."""
+        results: List[Union[str, ParkingException, None]] = [None] * len(vehicles)
+        planned: Dict[int, List[int]] = {}
+        pending: Dict[int, int] = {}
+        for i, vehicle in enumerate(vehicles):
+            try:
+                self._reserve_plate(vehicle.license_plate)
+            except VehicleAlreadyParkedException as e:
+                results[i] = e
+                continue
+            candidates = self._candidates(vehicle, pending) or self._candidates(vehicle)
+            if not candidates:
+                self._set_plate(vehicle.license_plate, None)
+                results[i] = ParkingFullException("No suitable spot available for this vehicle type")
+                continue
+            shard_id = candidates[0].shard_id
+            planned.setdefault(shard_id, []).append(i)
+            pending[shard_id] = pending.get(shard_id, 0) + 1
+
+        retry: List[int] = []
+        try:
+            for shard_id, positions in planned.items():
+                shard = self.shards[shard_id]
+                items = [(vehicles[i].vehicle_type.name, vehicles[i].license_plate) for i in positions]
+                for i, outcome in zip(positions, shard.call('park_many', items)):
+                    if isinstance(outcome, ParkingFullException):
+                        retry.append(i)  # that shard filled up: place it individually below
+                    elif isinstance(outcome, Exception):
+                        self._set_plate(vehicles[i].license_plate, None)
+                        results[i] = outcome
+                    else:
+                        self._set_plate(vehicles[i].license_plate, shard_id)
+                        results[i] = self._ticket(shard, outcome)
+
+            for i in retry:
+                self._set_plate(vehicles[i].license_plate, None)
+                try:
+                    results[i] = self.park_vehicle(vehicles[i])
+                except ParkingException as e:
+                    results[i] = e
+        except BaseException:
+            # A shard call failed outright (worker died, pipe error): release every plate not parked yet
+            for positions in planned.values():
+                for i in positions:
+                    if results[i] is None:
+                        self._set_plate(vehicles[i].license_plate, None)
+            raise
+        return results
+
+    def unpark_many(self, ticket_ids: List[str]) -> List[Union[str, ParkingException]]:
+        results: List[Union[str, ParkingException, None]] = [None] * len(ticket_ids)
+        grouped: Dict[int, List[Tuple[int, str]]] = {}
+        for i, ticket_id in enumerate(ticket_ids):
+            try:
+                shard, local_ticket = self._split_ticket(ticket_id)
+            except InvalidTicketException as e:
+                results[i] = e
+                continue
+            grouped.setdefault(shard.shard_id, []).append((i, local_ticket))
+
+        for shard_id, items in grouped.items():
+            outcomes = self.shards[shard_id].call('unpark_many', [t for _, t in items])
+            for (i, _), outcome in zip(items, outcomes):
+                if isinstance(outcome, Exception):
+                    results[i] = outcome
+                else:
+                    message, plate = outcome
+                    self._set_plate(plate, None)
+                    results[i] = message
+        return results
+
+    def find_vehicle(self, license_plate: str) -> Optional[dict]:
+        shard_id = self._plates.get(license_plate)
+        if shard_id is None:
+            return None
+        shard = self.shards[shard_id]
+        location = shard.call('find', license_plate)
+        if location is None:
+            return None
+        location['level_id'] += shard.level_offset
+        location['ticket_id'] = self._ticket(shard, location['ticket_id'])
+        return location
+
+    def get_parking_status(self) -> dict:
+        """Status of every shard merged, keyed by global level id."""
+        status = {}
+        for shard in self.shards:
+            for key, level_status in shard.call('status').items():
+                local_id = int(key[len('level_'):])
+                status[f'level_{local_id + shard.level_offset}'] = level_status
+        return status
+
+    def flush(self):
+        for shard in self.shards:
+            shard.call('flush')
+
+    def close(self):
+        """Flush and stop every worker."""
+        if self._closed:
+            return
+        self._closed = True
+        for shard in self.shards:
+            try:
+                shard.call('close')
+            except (EOFError, OSError):
+                pass  # worker already gone
+            shard.process.join(timeout=10)
@@ -0,0 +1,115 @@
+# Versioned, immutable availability snapshots for read-heavy clients (signage, /availability)
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Set, Tuple
+
+from .spot_store import SPOT_TYPES
+from .serialization import dumps, gzip_body
+
+if TYPE_CHECKING:
+    from .level import Level
+
+
+class LevelSnapshot(NamedTuple):
+    """One level's counters, replaced (never mutated) by the level on every spot change."""
+    level_id: int
+    version: int                 # bumped on every change of this level
+    total_spots: int
+    available: Tuple[int, ...]   # free spots per SpotType code (SPOT_TYPES order)
+    occupied_count: int
+
+
+class AvailabilitySnapshot(NamedTuple):
+    """Lot-wide availability at one version. status has the get_parking_status() shape; treat it as read-only."""
+    version: int
+    status: dict
+    body: bytes   # status as JSON, encoded once per version
+    etag: str     # "<process epoch>-<version>", unquoted
+    gzip_body: Optional[bytes] = None  # body gzip-compressed once per version (None if too small)
+
+
+class AvailabilityFeed:
+    """
+    Lock-free reads of lot availability.
+
+    Each Level publishes a new LevelSnapshot under its own lock whenever a spot
+    changes; the lot version is the sum of the level versions, so it only grows.
+    current() reads every level's snapshot once (one attribute read each, no
+    locks) and rebuilds the lot snapshot, JSON-encoded and gzipped once, only
+    when that version moved (a park or unpark), so heavy read traffic never
+    contends with the gates nor re-serializes anything. A level's counters are always
+    self-consistent; a snapshot can mix levels from slightly different moments,
+    which never breaks a per-level count since a vehicle occupies one level.
+    wait_for_change() lets long-poll/stream readers sleep until a gate changes
+    something (add_listener() is the same for event-loop readers, which must not
+    block a thread); notify() is free while nobody is waiting.
+    """
+
+    def __init__(self, levels: List["Level"]):
+        self._levels = levels
+        self._current: Optional[AvailabilitySnapshot] = None
+        self._epoch = os.urandom(4).hex()  # versions restart with the process; ETags must not repeat
+        self._changed = threading.Condition()
+        self._waiters = 0
+        self._listeners: Set[Callable[[], None]] = set()
+
+    def current(self) -> AvailabilitySnapshot:
+        snapshots = [level.snapshot for level in self._levels]
+        version = sum(s.version for s in snapshots)
+        current = self._current
+        if current is not None and current.version == version:
+            return current
+
+        status = {
+            f'level_{s.level_id}': {
+                'available_spots': {t.name: s.available[code] for code, t in enumerate(SPOT_TYPES)},
+                'total_spots': s.total_spots,
+                'occupied_count': s.occupied_count,
+            }
+            for s in snapshots
+        }
+        body = dumps(status)
+        snapshot = AvailabilitySnapshot(version, status, body, f"{self._epoch}-{version}", gzip_body(body))
+        if current is None or version > current.version:  # concurrent rebuilds: keep the newest
+            self._current = snapshot
+        return snapshot
+
+    def notify(self):
+        """Called by the write path after a spot changed: wake waiting readers."""
+        if self._waiters:
+            with self._changed:
+                self._changed.notify_all()
+        if self._listeners:
+            for listener in tuple(self._listeners):
+                listener()
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Call listener() (on the writer's thread; it must not block) after every change until removed."""
+        with self._changed:
+            self._listeners.add(listener)
+
+    def remove_listener(self, listener: Callable[[], None]):
+        with self._changed:
+            self._listeners.discard(listener)
+
+    def wait_for_change(self, since_version: int, timeout: float) -> AvailabilitySnapshot:
+        """
+        Return the first snapshot whose version differs from since_version, or the
+        current (unchanged) one after timeout seconds.
+        """
+        snapshot = self.current()
+        if snapshot.version != since_version or timeout <= 0:
+            return snapshot
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            self._waiters += 1  # registered before re-checking, so a change now will notify us
+            try:
+                while True:
+                    snapshot = self.current()
+                    remaining = deadline - time.monotonic()
+                    if snapshot.version != since_version or remaining <= 0:
+                        return snapshot
+                    self._changed.wait(remaining)
+            finally:
+                self._waiters -= 1
@@ -0,0 +1,120 @@
+# Columnar (array-backed) storage for the spots of one level
+from array import array
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from .enums import SpotType, VehicleType
+
+SPOT_TYPES: List[SpotType] = list(SpotType)           # column code -> SpotType
+VEHICLE_TYPES: List[VehicleType] = list(VehicleType)  # column code -> VehicleType
+SPOT_TYPE_CODES = {t: i for i, t in enumerate(SPOT_TYPES)}
+VEHICLE_TYPE_CODES = {t: i for i, t in enumerate(VEHICLE_TYPES)}
+
+_EPOCH = datetime(1970, 1, 1)  # naive, like datetime.now(): round-trips exactly
+_MICROSECOND = timedelta(microseconds=1)
+FREE = -1  # plate / vehicle type code of an empty spot
+
+
+def to_epoch_us(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+class SpotStore:
+    """
+    Spot state for one level kept in parallel typed arrays instead of one Python
+    object per spot. Index i of every column describes the same spot:
+
+        numbers[i]        spot number
+        types[i]          SpotType code (position in SpotType)
+        occupied[i]       1 if occupied (one byte per spot)
+        vehicle_types[i]  VehicleType code, FREE when empty
+        entry_us[i]       entry time in microseconds since the epoch, 0 when empty
+        plate_ids[i]      index into the plate table, FREE when empty
+        spot_ids[i]       storage row id of the spot (SQLite spots.id), FREE if the backend has none
+
+    Plates live once in a small table whose slots are recycled on unpark, so
+    the columns cost ~35 bytes per spot plus the plate strings (bench_memory.py:
+    ~87 B/spot at 80% occupancy). ParkingSpot objects are thin views (store, index)
+    over these columns, created on access (Level.spots is a SpotViews).
+    """
+
+    def __init__(self, level_id: int):
+        self.level_id = level_id
+        self.observer = None  # owning Level, notified by ParkingSpot.park/unpark
+        self.numbers = array('l')
+        self.types = array('b')
+        self.occupied = bytearray()
+        self.vehicle_types = array('b')
+        self.entry_us = array('q')
+        self.plate_ids = array('l')
+        self.spot_ids = array('q')
+        self._plates: List[Optional[str]] = []
+        self._free_plate_slots: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def append(self, number: int, spot_type: SpotType, spot_id: int = FREE) -> int:
+        """Add an empty spot and return its index."""
+        self.numbers.append(number)
+        self.types.append(SPOT_TYPE_CODES[spot_type])
+        self.occupied.append(0)
+        self.vehicle_types.append(FREE)
+        self.entry_us.append(0)
+        self.plate_ids.append(FREE)
+        self.spot_ids.append(spot_id)
+        return len(self.numbers) - 1
+
+    def extend(self, spot_type: SpotType, first_number: int, count: int):
+        """Add count empty spots of one type, numbered from first_number (bulk layout build)."""
+        self.numbers.extend(range(first_number, first_number + count))
+        self.types.extend([SPOT_TYPE_CODES[spot_type]] * count)
+        self.occupied.extend(bytes(count))
+        self.vehicle_types.extend([FREE] * count)
+        self.entry_us.extend([0] * count)
+        self.plate_ids.extend([FREE] * count)
+        self.spot_ids.extend([FREE] * count)
+
+    def spot_type(self, i: int) -> SpotType:
+        return SPOT_TYPES[self.types[i]]
+
+    def spot_id(self, i: int) -> Optional[int]:
+        spot_id = self.spot_ids[i]
+        return None if spot_id == FREE else spot_id
+
+    def plate(self, i: int) -> Optional[str]:
+        plate_id = self.plate_ids[i]
+        return None if plate_id == FREE else self._plates[plate_id]
+
+    def set_vehicle(self, i: int, license_plate: str, vehicle_type: VehicleType, entry_us: int):
+        """Record the parked vehicle's columns (occupancy flag is set separately)."""
+        self.clear_vehicle(i)
+        if self._free_plate_slots:
+            plate_id = self._free_plate_slots.pop()
+            self._plates[plate_id] = license_plate
+        else:
+            plate_id = len(self._plates)
+            self._plates.append(license_plate)
+        self.plate_ids[i] = plate_id
+        self.vehicle_types[i] = VEHICLE_TYPE_CODES[vehicle_type]
+        self.entry_us[i] = entry_us
+
+    def clear_vehicle(self, i: int):
+        plate_id = self.plate_ids[i]
+        if plate_id != FREE:
+            self._plates[plate_id] = None
+            self._free_plate_slots.append(plate_id)
+        self.plate_ids[i] = FREE
+        self.vehicle_types[i] = FREE
+        self.entry_us[i] = 0
+
+    def nbytes(self) -> int:
+        """Approximate size of the column buffers (excluding plate strings)."""
+        columns = (self.numbers, self.types, self.vehicle_types, self.entry_us, self.plate_ids,
+                   self.spot_ids)
+        return (sum(c.itemsize * len(c) for c in columns) + len(self.occupied)
+                + 8 * len(self._plates))
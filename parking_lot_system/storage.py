@@ -0,0 +1,201 @@
+# Storage interface used by ParkingLot, plus the SQLite backend built on db.py
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .level import Level
+from .enums import SpotType
+from .models import TicketEntry
+from .events import ParkEvent, UnparkEvent, ParkingEvent, CompletedSession
+from .reservations import Reservation
+from .write_behind import WriteBehindWriter
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from . import db
+
+
+class StorageBackend(ABC):
+    """
+    Persistence engine behind a ParkingLot.
+    The lot keeps the authoritative state in memory and reports every change
+    as a ParkEvent / UnparkEvent; the backend only has to make them durable
+    and rebuild the state on startup.
+    Backends time their durable writes as 'commit' on self.instrumentation
+    (set by the owning ParkingLot).
+    """
+    instrumentation: Instrumentation = NULL_INSTRUMENTATION
+
+    @abstractmethod
+    def load(self, num_levels: int, spots_per_level: int) -> Tuple[List[Level], Dict[str, TicketEntry]]:
+        """
+        Create the initial layout if storage is empty, then return the current state:
+        (levels, {ticket_id: TicketEntry}).
+        """
+        pass
+
+    def load_counts(self, num_levels: int, spots_per_level: int
+                    ) -> Optional[List[Tuple[int, Dict[SpotType, int], Dict[SpotType, int]]]]:
+        """
+        Like load(), but only the per-level (level_id, {SpotType: free}, {SpotType: occupied})
+        counters, for a lazy ParkingLot; load() follows once spot state is needed.
+        Backends that can't do better than load() return None and the lot loads eagerly.
+        """
+        return None
+
+    @abstractmethod
+    def save_park(self, event: ParkEvent):
+        pass
+
+    @abstractmethod
+    def save_unpark(self, event: UnparkEvent):
+        pass
+
+    def save_events(self, events: List[ParkingEvent]):
+        """Persist several events; backends override this to use a single transaction."""
+        for event in events:
+            if isinstance(event, ParkEvent):
+                self.save_park(event)
+            else:
+                self.save_unpark(event)
+
+    def load_reservations(self) -> List[Reservation]:
+        """
+        Reservations stored by save_reservation (called after load()).
+        Backends that don't persist reservations keep them in memory only.
+        """
+        return []
+
+    def save_reservation(self, reservation: Reservation):
+        pass
+
+    def delete_reservations(self, reservation_ids: List[str]):
+        pass
+
+    def iter_sessions(self, start: datetime, end: datetime,
+                      license_plate: Optional[str] = None) -> Iterator[CompletedSession]:
+        """
+        Stream archived sessions overlapping [start, end), optionally for one plate.
+        Backends without a session archive yield nothing.
+        """
+        return iter(())
+
+    def flush(self):
+        """Block until every accepted event is durable."""
+        pass
+
+    def close(self):
+        """Flush and release resources."""
+        pass
+
+
+class SQLiteStorage(StorageBackend):
+    """SQLite backend (db.py). Optionally write-behind: events are group-committed in the background."""
+
+    def __init__(self, db_file: Optional[str] = None, write_behind: bool = False):
+        self.db_file = db_file or db.DB_FILE
+        self._writer: Optional[WriteBehindWriter] = (
+            WriteBehindWriter(self._save_batch, on_error=self._write_failed) if write_behind else None
+        )
+
+    def _write_failed(self, event: ParkingEvent, error: Exception):
+        self.instrumentation.count('write_behind_failed')
+        self.instrumentation.event(logging.ERROR, 'write_behind_failed', event=event, error=error)
+
+    def load(self, num_levels, spots_per_level):
+        db.ensure_db(num_levels, spots_per_level, self.db_file)
+        return db.load_state(self.db_file)
+
+    def load_counts(self, num_levels, spots_per_level):
+        db.ensure_db(num_levels, spots_per_level, self.db_file)
+        return db.load_level_counts(self.db_file)
+
+    def _save_batch(self, events: List[ParkingEvent]):
+        with self.instrumentation.timer('commit'):
+            db.save_events_to_db(events, self.db_file)
+
+    def save_park(self, event):
+        if self._writer is not None:
+            self._writer.submit(event)
+        else:
+            self._save_batch([event])
+
+    def save_unpark(self, event):
+        if self._writer is not None:
+            self._writer.submit(event)
+        else:
+            self._save_batch([event])  # keeps event.spot_id, so no ticket -> spot lookup query
+
+    def save_events(self, events):
+        if self._writer is not None:
+            for event in events:
+                self._writer.submit(event)
+        else:
+            self._save_batch(events)
+
+    # Reservations are rare compared to park/unpark and must be durable before they are confirmed,
+    # so they are written synchronously even in write-behind mode
+    def load_reservations(self):
+        return db.load_reservations(self.db_file)
+
+    def save_reservation(self, reservation):
+        db.save_reservation(reservation, self.db_file)
+
+    def delete_reservations(self, reservation_ids):
+        if reservation_ids:
+            db.delete_reservations(reservation_ids, self.db_file)
+
+    def iter_sessions(self, start, end, license_plate=None):
+        # Unparks still queued in write-behind mode show up once committed
+        return db.iter_completed_sessions(start, end, license_plate, self.db_file)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        db.close_connections(self.db_file)
+
+
+class InMemoryStorage(StorageBackend):
+    """
+    Nothing is persisted: every start gets a fresh default layout (split by distribution,
+    see Level). For simulations and tests. With keep_sessions the finished stays are kept
+    in memory, so iter_sessions() and the analytics functions work as with the other backends.
+    parks / unparks / revenue are running totals.
+    """
+
+    def __init__(self, distribution: Optional[Dict[str, float]] = None, keep_sessions: bool = True):
+        self.distribution = distribution
+        self.keep_sessions = keep_sessions
+        self._parked: Dict[str, ParkEvent] = {}  # ticket_id -> park event (only with keep_sessions)
+        self.sessions: List[CompletedSession] = []
+        self.parks = 0
+        self.unparks = 0
+        self.revenue = 0.0  # sum of the fees of every unpark
+
+    def load(self, num_levels, spots_per_level):
+        levels = [Level(i + 1, spots_per_level, distribution=self.distribution) for i in range(num_levels)]
+        return levels, {}
+
+    def save_park(self, event):
+        self.parks += 1
+        if self.keep_sessions:
+            self._parked[event.ticket_id] = event
+
+    def save_unpark(self, event):
+        self.unparks += 1
+        self.revenue += event.fee or 0.0
+        parked = self._parked.pop(event.ticket_id, None) if self.keep_sessions else None
+        if parked is not None:
+            self.sessions.append(CompletedSession(event.ticket_id, parked.license_plate, parked.vehicle_type,
+                                                  parked.level_id, parked.spot_num, parked.entry_time,
+                                                  event.exit_time, event.fee))
+
+    def iter_sessions(self, start, end, license_plate=None):
+        start_iso, end_iso = start.isoformat(), end.isoformat()
+        for session in self.sessions:
+            if session.exit_time > start_iso and session.entry_time < end_iso and (
+                    license_plate is None or session.license_plate == license_plate):
+                yield session
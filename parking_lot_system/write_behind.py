@@ -0,0 +1,114 @@
+# Write-behind persistence: park/unpark events are queued and group-committed by a background thread
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .events import ParkingEvent
+from .config import (
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    WRITE_BEHIND_MAX_PENDING,
+)
+
+_STOP = object()  # sentinel that tells the writer thread to exit
+
+
+class WriteBehindWriter:
+    """
+    Queues persistence events and applies them in batches on a background thread.
+
+    A batch is committed once batch_size events are queued or flush_interval_ms has
+    passed since its first event, whichever comes first. At most max_pending events
+    can be waiting at any time (the durability bound): submit() blocks once the queue
+    is full, so a crash can never lose more than max_pending acknowledged events.
+    on_error(event, exc) is called on the writer thread for each event that fails to persist.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[ParkingEvent]], None],
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval_ms: float = WRITE_BEHIND_FLUSH_INTERVAL_MS,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING,
+                 on_error: Optional[Callable[[ParkingEvent, Exception], None]] = None):
+        self._apply_batch = apply_batch
+        self._on_error = on_error
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="parking-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # don't drop queued events on interpreter exit
+
+    def submit(self, event: ParkingEvent):
+        """Queue an event for persistence. Blocks while max_pending events are outstanding."""
+        if self._closed:
+            raise RuntimeError("Write-behind writer is closed")
+        self._queue.put(event)
+
+    def flush(self):
+        """Block until every event submitted so far is committed. Re-raises a writer failure."""
+        self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """Flush outstanding events and stop the writer thread (safe to call twice)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                return
+
+            # Collect a batch: up to batch_size events or until the flush interval elapses
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is _STOP:
+                    stop = True
+                    break
+                batch.append(event)
+
+            self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _commit(self, batch: List[ParkingEvent]):
+        try:
+            self._apply_batch(batch)
+        except Exception:
+            # One bad event must not take the rest of the batch down with it:
+            # retry each event in its own transaction and keep the first error for flush()
+            for event in batch:
+                try:
+                    self._apply_batch([event])
+                except Exception as e:
+                    if self._on_error is not None:
+                        self._on_error(event, e)
+                    if self._error is None:
+                        self._error = e
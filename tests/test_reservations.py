@@ -0,0 +1,47 @@
+# Reservations vs walk-ins: run with `python -m unittest discover tests` (or pytest)
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parking_lot_system.clock import SimulatedClock  # noqa: E402
+from parking_lot_system.enums import SpotType  # noqa: E402
+from parking_lot_system.exceptions import ParkingFullException  # noqa: E402
+from parking_lot_system.models import Bus  # noqa: E402
+from parking_lot_system.parking_lot import ParkingLot  # noqa: E402
+from parking_lot_system.storage import InMemoryStorage  # noqa: E402
+
+
+class WalkInsBeforeBookingTest(unittest.TestCase):
+    """One level of 10 spots: 4 LARGE, of which 2 may be booked."""
+
+    def setUp(self):
+        self.clock = SimulatedClock(datetime(2026, 1, 1, 12, 0))
+        self.lot = ParkingLot(1, 10, storage=InMemoryStorage(), clock=self.clock)
+
+    def _fill_large(self):
+        parked = []
+        for i in range(4):
+            try:
+                parked.append(self.lot.park_vehicle(Bus(f'WALKIN{i}')))
+            except ParkingFullException:
+                pass
+        return parked
+
+    def test_walk_ins_before_the_window_leave_the_booked_spot(self):
+        self.lot.reserve('BOOKED', SpotType.LARGE, datetime(2026, 1, 1, 13), datetime(2026, 1, 1, 15))
+        self.assertEqual(len(self._fill_large()), 3)  # one LARGE stays free for the booking an hour ahead
+
+        self.clock.set(datetime(2026, 1, 1, 12, 55))  # early arrival
+        self.lot.park_vehicle(Bus('BOOKED'))
+        self.assertIsNone(self.lot.reservations.for_plate('BOOKED', self.clock.now()))  # checked in
+
+    def test_bookings_beyond_a_walk_in_stay_do_not_block(self):
+        self.lot.reserve('LATER', SpotType.LARGE, datetime(2026, 1, 2, 9), datetime(2026, 1, 2, 10))
+        self.assertEqual(len(self._fill_large()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()